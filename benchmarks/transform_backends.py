@@ -0,0 +1,75 @@
+"""
+Transform Backend Benchmark
+
+Compares latency and throughput of the local and Cloudinary transform backends on
+the same source image and transformation. Each run downloads the source, applies
+the transformation and uploads the result, as ImageService.transform_image does.
+
+Configure the storage settings in .env, then run::
+
+    python -m benchmarks.transform_backends --url <image url> --width 400 --rotation 90
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from src.image.schemas import (
+    EditFormData,
+    ImageScaleTransformation,
+    ImageRotationTransformation,
+    ImageBlackAndWhiteTransformation,
+)
+from src.image.utils.storage_client import storage_client
+from src.image.utils.transform_backends import cloudinary_backend, local_backend
+
+
+async def run_backend(backend, args, edit_data: EditFormData):
+    latencies = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one():
+        async with semaphore:
+            public_id = f"Memento/benchmark/transformed/{uuid.uuid4()}"
+            started = time.perf_counter()
+            await backend.transform(args.url, edit_data, public_id)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.requests)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    print(
+        f"{backend.name}: {args.requests / elapsed:.1f} transforms/s, "
+        f"median={statistics.median(latencies) * 1000:.0f}ms p95={p95 * 1000:.0f}ms"
+    )
+
+
+async def main(args):
+    edit_data = EditFormData(
+        scale=ImageScaleTransformation(Width=args.width, Height=args.height),
+        black_and_white=ImageBlackAndWhiteTransformation(black_and_white=args.grayscale),
+        rotation=ImageRotationTransformation(angle=args.rotation),
+    )
+    try:
+        for backend in (local_backend, cloudinary_backend):
+            if args.backend in (backend.name, "both"):
+                await run_backend(backend, args, edit_data)
+    finally:
+        await storage_client.close()
+        local_backend.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Transform backend benchmark")
+    parser.add_argument("--url", required=True, help="URL of a stored source image")
+    parser.add_argument("--backend", choices=["local", "cloudinary", "both"], default="both")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--width", type=int, default=400)
+    parser.add_argument("--height", type=int, default=0)
+    parser.add_argument("--rotation", type=int, default=90)
+    parser.add_argument("--grayscale", action="store_true")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,84 @@
+"""
+Upload Throughput Benchmark
+
+Fires concurrent uploads at POST /api/image/create while probing the latency of
+an unrelated endpoint, to check that uploads do not stall the event loop.
+
+Start the storage stand-in (``python -m src.image.utils.storage_stub``) and the API
+pointed at it, then run::
+
+    python benchmarks/upload_throughput.py --token <access token> --image cat.jpg
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+
+
+async def upload(session, args, data: bytes, latencies: list[float]):
+    form = aiohttp.FormData()
+    form.add_field("title", "benchmark")
+    form.add_field("image_file", data, filename="benchmark.jpg")
+    started = time.perf_counter()
+    async with session.post(f"{args.api}/api/image/create", data=form) as response:
+        await response.read()
+        response.raise_for_status()
+    latencies.append(time.perf_counter() - started)
+
+
+async def probe(session, args, stop: asyncio.Event, latencies: list[float]):
+    while not stop.is_set():
+        started = time.perf_counter()
+        async with session.get(f"{args.api}/") as response:
+            await response.read()
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.05)
+
+
+def report(name: str, latencies: list[float]):
+    if not latencies:
+        print(f"{name}: no samples")
+        return
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1 if len(latencies) > 1 else 0]
+    print(
+        f"{name}: n={len(latencies)} "
+        f"median={statistics.median(latencies) * 1000:.1f}ms p99={p99 * 1000:.1f}ms"
+    )
+
+
+async def main(args):
+    with open(args.image, "rb") as f:
+        data = f.read()
+    headers = {"Authorization": f"Bearer {args.token}"}
+    upload_latencies, probe_latencies = [], []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def bounded(session):
+        async with semaphore:
+            await upload(session, args, data, upload_latencies)
+
+    async with aiohttp.ClientSession(headers=headers) as session:
+        stop = asyncio.Event()
+        prober = asyncio.create_task(probe(session, args, stop, probe_latencies))
+        started = time.perf_counter()
+        await asyncio.gather(*(bounded(session) for _ in range(args.requests)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await prober
+
+    print(f"uploads/s: {args.requests / elapsed:.1f}")
+    report("upload", upload_latencies)
+    report("probe", probe_latencies)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Upload throughput benchmark")
+    parser.add_argument("--api", default="http://127.0.0.1:8000")
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--image", required=True)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
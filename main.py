@@ -2,15 +2,19 @@ import uvicorn
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 
-from sqlalchemy import text
+from sqlalchemy import select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from redis.asyncio.client import Redis
 
 from src.auth.service import user_service, current_active_user
-from src.database.sql.models import User
+from src.database.sql.models import Image, User
 from src.database.sql.postgres import database
 from src.database.cache.redis_conn import cache_database
+from src.database.cache.events import event_broker
+from src.database.cache.feed_cache import feed_cache
 from src.auth.utils.access import AccessService
+from src.image.utils.storage_client import storage_client
+from src.image.utils.transform_backends import local_backend
 
 from src.image.routes import router as images
 from src.auth.routes import router as auth
@@ -42,9 +46,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Prev-Cursor"],
 )
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    """
+    Close the pooled storage HTTP session, the image event stream and the local
+    transform process pool.
+"""
+    await storage_client.close()
+    await event_broker.close()
+    local_backend.shutdown()
+
+
 @app.get("/")
 def read_root():
     """
@@ -66,26 +82,31 @@ async def healthchecker(
         :param db: AsyncSession = Depends(database): The database session.
         :param cache: Redis = Depends(cache_database): The cache database.
 
-        :return: dict: A dictionary with a message indicating the status of the databases.
+        :return: dict: A dictionary with a message indicating the status of the databases
+            and the hit/miss counters of the feed cache.
 """
     print("postgres connection check...")
     await db.execute(text("SELECT 1"))
     print("redis connection check...")
     await cache.set("1", 1)
-    return {"message": "Databases are OK!"}
+    return {"message": "Databases are OK!", "feed_cache": await feed_cache.stats()}
 
 
 @app.get("/example/user-authenticated")
-async def authenticated_route(user: User = Depends(current_active_user)):
+async def authenticated_route(
+        user: User = Depends(current_active_user),
+        db: AsyncSession = Depends(database),
+):
     """
     The authenticated_route function is a route that requires authentication.
     It will return the email of the user and all images associated with that user.
 
     :param user: User: Get the user object from the database
+    :param db: AsyncSession: The database session
     :return: A dictionary with the email and images of the user
 """
-    print(user.images)
-    return {"email": user.email, "images": user.images}
+    images = await db.scalars(select(Image).where(Image.owner_id == user.id))
+    return {"email": user.email, "images": images.all()}
 
 
 if __name__ == "__main__":
@@ -0,0 +1,54 @@
+"""Rating sum and count
+
+Revision ID: 1c6d8e2f4a93
+Revises: 7a1f3c5e9b20
+Create Date: 2026-10-17 18:02:47.913205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1c6d8e2f4a93'
+down_revision: Union[str, None] = '7a1f3c5e9b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('images', sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('images', sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False))
+    # Keep only the latest rating of every user per image before enforcing uniqueness.
+    op.execute(
+        """
+        DELETE FROM ratings USING ratings AS newer
+        WHERE ratings.owner_id = newer.owner_id
+          AND ratings.image_id = newer.image_id
+          AND ratings.id < newer.id
+        """
+    )
+    op.execute(
+        """
+        UPDATE images
+        SET rating_sum = totals.rating_sum,
+            rating_count = totals.rating_count,
+            rating = round(totals.rating_sum::numeric / totals.rating_count, 2)
+        FROM (
+            SELECT image_id, sum(value) AS rating_sum, count(*) AS rating_count
+            FROM ratings GROUP BY image_id
+        ) AS totals
+        WHERE images.id = totals.image_id
+        """
+    )
+    with op.get_context().autocommit_block():
+        op.create_index('uq_ratings_owner_id_image_id', 'ratings', ['owner_id', 'image_id'], unique=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('uq_ratings_owner_id_image_id', table_name='ratings', postgresql_concurrently=True)
+    op.drop_column('images', 'rating_count')
+    op.drop_column('images', 'rating_sum')
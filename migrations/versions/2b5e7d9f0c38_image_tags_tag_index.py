@@ -0,0 +1,28 @@
+"""Image tags tag index
+
+Revision ID: 2b5e7d9f0c38
+Revises: 6f0a9c4e2b71
+Create Date: 2026-10-17 21:05:44.180263
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b5e7d9f0c38'
+down_revision: Union[str, None] = '6f0a9c4e2b71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_image_tags_tag_id_image_id', 'image_tags', ['tag_id', 'image_id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_image_tags_tag_id_image_id', table_name='image_tags', postgresql_concurrently=True)
@@ -0,0 +1,32 @@
+"""Feed aggregate indexes
+
+Revision ID: 3f9c1d2e7a40
+Revises: a575303dfa5d
+Create Date: 2026-10-17 11:03:12.540118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c1d2e7a40'
+down_revision: Union[str, None] = 'a575303dfa5d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_likes_image_id'), 'likes', ['image_id'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_comments_image_id'), 'comments', ['image_id'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_image_tags_image_id'), 'image_tags', ['image_id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_image_tags_image_id'), table_name='image_tags', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_comments_image_id'), table_name='comments', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_likes_image_id'), table_name='likes', postgresql_concurrently=True)
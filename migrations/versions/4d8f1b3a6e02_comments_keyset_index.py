@@ -0,0 +1,30 @@
+"""Comments keyset index
+
+Revision ID: 4d8f1b3a6e02
+Revises: 9e4b2a7c1d56
+Create Date: 2026-10-17 19:48:51.203377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d8f1b3a6e02'
+down_revision: Union[str, None] = '9e4b2a7c1d56'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_comments_image_id_created_at_id', 'comments', ['image_id', 'created_at', 'id'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_comments_image_id', table_name='comments', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_comments_image_id', 'comments', ['image_id'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_comments_image_id_created_at_id', table_name='comments', postgresql_concurrently=True)
@@ -0,0 +1,41 @@
+"""Stored assets
+
+Revision ID: 5b7e0c9d2f18
+Revises: c4e8a1f0b327
+Create Date: 2026-10-17 15:08:27.604311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e0c9d2f18'
+down_revision: Union[str, None] = 'c4e8a1f0b327'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('stored_assets',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('public_id', sa.String(length=300), nullable=False),
+    sa.Column('cloudinary_url', sa.String(length=300), nullable=False),
+    sa.Column('ref_count', sa.Integer(), server_default='1', nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('content_hash')
+    )
+    op.add_column('images', sa.Column('asset_id', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_images_asset_id'), 'images', ['asset_id'], unique=False)
+    op.create_foreign_key('images_asset_id_fkey', 'images', 'stored_assets', ['asset_id'], ['id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('images_asset_id_fkey', 'images', type_='foreignkey')
+    op.drop_index(op.f('ix_images_asset_id'), table_name='images')
+    op.drop_column('images', 'asset_id')
+    op.drop_table('stored_assets')
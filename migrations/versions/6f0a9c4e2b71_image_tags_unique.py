@@ -0,0 +1,43 @@
+"""Image tags unique
+
+Revision ID: 6f0a9c4e2b71
+Revises: 4d8f1b3a6e02
+Create Date: 2026-10-17 20:31:09.557104
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6f0a9c4e2b71'
+down_revision: Union[str, None] = '4d8f1b3a6e02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        DELETE FROM image_tags USING image_tags AS kept
+        WHERE image_tags.image_id = kept.image_id
+          AND image_tags.tag_id = kept.tag_id
+          AND image_tags.id > kept.id
+        """
+    )
+    with op.get_context().autocommit_block():
+        op.create_index('uq_image_tags_image_id_tag_id', 'image_tags', ['image_id', 'tag_id'], unique=True, postgresql_concurrently=True)
+    op.execute(
+        "ALTER TABLE image_tags ADD CONSTRAINT uq_image_tags_image_id_tag_id "
+        "UNIQUE USING INDEX uq_image_tags_image_id_tag_id"
+    )
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_image_tags_image_id', table_name='image_tags', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_image_tags_image_id', 'image_tags', ['image_id'], unique=False, postgresql_concurrently=True)
+    op.drop_constraint('uq_image_tags_image_id_tag_id', 'image_tags', type_='unique')
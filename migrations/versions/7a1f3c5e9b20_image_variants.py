@@ -0,0 +1,27 @@
+"""Image variants
+
+Revision ID: 7a1f3c5e9b20
+Revises: e93a47b5c6d1
+Create Date: 2026-10-17 17:15:36.281940
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a1f3c5e9b20'
+down_revision: Union[str, None] = 'e93a47b5c6d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('images', sa.Column('variants', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('images', 'variants')
@@ -0,0 +1,45 @@
+"""Tag stats
+
+Revision ID: 8c3e5a1d7f49
+Revises: 2b5e7d9f0c38
+Create Date: 2026-10-17 21:47:18.336920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c3e5a1d7f49'
+down_revision: Union[str, None] = '2b5e7d9f0c38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('tag_stats',
+    sa.Column('tag_id', sa.Integer(), nullable=False),
+    sa.Column('image_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['tag_id'], ['tags.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('tag_id')
+    )
+    op.create_index(op.f('ix_tag_stats_image_count'), 'tag_stats', ['image_count'], unique=False)
+    op.create_table('tag_cooccurrences',
+    sa.Column('tag_id', sa.Integer(), nullable=False),
+    sa.Column('related_tag_id', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['related_tag_id'], ['tags.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['tag_id'], ['tags.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('tag_id', 'related_tag_id')
+    )
+    op.create_index('ix_tag_cooccurrences_tag_id_count', 'tag_cooccurrences', ['tag_id', 'count'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tag_cooccurrences_tag_id_count', table_name='tag_cooccurrences')
+    op.drop_table('tag_cooccurrences')
+    op.drop_index(op.f('ix_tag_stats_image_count'), table_name='tag_stats')
+    op.drop_table('tag_stats')
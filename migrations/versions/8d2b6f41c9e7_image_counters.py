@@ -0,0 +1,42 @@
+"""Image counters
+
+Revision ID: 8d2b6f41c9e7
+Revises: 3f9c1d2e7a40
+Create Date: 2026-10-17 12:21:05.774390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2b6f41c9e7'
+down_revision: Union[str, None] = '3f9c1d2e7a40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('images', sa.Column('likes_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('images', sa.Column('comments_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        """
+        UPDATE images SET likes_count = counts.total
+        FROM (SELECT image_id, count(*) AS total FROM likes GROUP BY image_id) AS counts
+        WHERE images.id = counts.image_id
+        """
+    )
+    op.execute(
+        """
+        UPDATE images SET comments_count = counts.total
+        FROM (SELECT image_id, count(*) AS total FROM comments GROUP BY image_id) AS counts
+        WHERE images.id = counts.image_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('images', 'comments_count')
+    op.drop_column('images', 'likes_count')
@@ -0,0 +1,43 @@
+"""Rating histogram
+
+Revision ID: 9e4b2a7c1d56
+Revises: 1c6d8e2f4a93
+Create Date: 2026-10-17 19:10:22.648017
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4b2a7c1d56'
+down_revision: Union[str, None] = '1c6d8e2f4a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('images', sa.Column('rating_histogram', postgresql.ARRAY(sa.Integer()), server_default='{0,0,0,0,0}', nullable=False))
+    op.execute(
+        """
+        UPDATE images SET rating_histogram = counts.histogram
+        FROM (
+            SELECT image_id, ARRAY[
+                count(*) FILTER (WHERE value = 1),
+                count(*) FILTER (WHERE value = 2),
+                count(*) FILTER (WHERE value = 3),
+                count(*) FILTER (WHERE value = 4),
+                count(*) FILTER (WHERE value = 5)
+            ]::integer[] AS histogram
+            FROM ratings GROUP BY image_id
+        ) AS counts
+        WHERE images.id = counts.image_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('images', 'rating_histogram')
@@ -0,0 +1,34 @@
+"""Feed keyset index
+
+Revision ID: a575303dfa5d
+Revises: bab727219414
+Create Date: 2026-10-17 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a575303dfa5d'
+down_revision: Union[str, None] = 'bab727219414'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Built concurrently so the images table stays writable while it is indexed.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_images_created_at_id', 'images', ['created_at', 'id'],
+            unique=False, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_images_created_at_id', table_name='images', postgresql_concurrently=True
+        )
@@ -0,0 +1,50 @@
+"""Image search vector
+
+Revision ID: c4e8a1f0b327
+Revises: 8d2b6f41c9e7
+Create Date: 2026-10-17 13:40:52.118023
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a1f0b327'
+down_revision: Union[str, None] = '8d2b6f41c9e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('images', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    op.execute(
+        """
+        UPDATE images SET search_vector =
+            setweight(to_tsvector('simple'::regconfig, coalesce(images.title, '')), 'A')
+            || setweight(to_tsvector('simple'::regconfig, coalesce((
+                SELECT string_agg(tags.name, ' ')
+                FROM tags JOIN image_tags ON image_tags.tag_id = tags.id
+                WHERE image_tags.image_id = images.id
+            ), '')), 'B')
+            || setweight(to_tsvector('simple'::regconfig, coalesce((
+                SELECT string_agg(comments.text, ' ')
+                FROM comments
+                WHERE comments.image_id = images.id
+            ), '')), 'C')
+        """
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_images_search_vector', 'images', ['search_vector'], unique=False,
+            postgresql_using='gin', postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_images_search_vector', table_name='images', postgresql_concurrently=True)
+    op.drop_column('images', 'search_vector')
@@ -0,0 +1,35 @@
+"""Profile keyset index
+
+Revision ID: d3a9f2c6b814
+Revises: 8c3e5a1d7f49
+Create Date: 2026-10-17 23:05:12.604117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a9f2c6b814'
+down_revision: Union[str, None] = '8c3e5a1d7f49'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Built concurrently so the images table stays writable while it is indexed.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_images_owner_id_created_at_id', 'images', ['owner_id', 'created_at', 'id'],
+            unique=False, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_images_owner_id_created_at_id', table_name='images',
+            postgresql_concurrently=True
+        )
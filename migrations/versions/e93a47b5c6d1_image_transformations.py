@@ -0,0 +1,34 @@
+"""Image transformations
+
+Revision ID: e93a47b5c6d1
+Revises: 5b7e0c9d2f18
+Create Date: 2026-10-17 16:02:44.930217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e93a47b5c6d1'
+down_revision: Union[str, None] = '5b7e0c9d2f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('image_transformations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('spec_hash', sa.String(length=64), nullable=False),
+    sa.Column('source_public_id', sa.String(length=300), nullable=False),
+    sa.Column('edited_url', sa.String(length=300), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('spec_hash')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('image_transformations')
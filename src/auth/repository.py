@@ -2,17 +2,23 @@ from uuid import UUID
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, raiseload
 from fastapi import HTTPException, status, Depends
 from jose import JWTError, jwt
 from sqlalchemy.exc import IntegrityError
 
 from src.auth.schemas import UserCreate
-from src.database.sql.models import User, Image
+from src.database.sql.models import User
 from src.database.sql.postgres import database
+from src.image.repository import ImageQuery
+
+# A user is loaded with its permission only; its images, ratings and likes raise
+# on access instead of being loaded along with every authenticated request.
+USER_LOAD_OPTIONS = (joinedload(User.permission), raiseload("*"))
 
 
 async def id_user_auth(_id: str, db: AsyncSession) -> User:
-    result = await db.execute(select(User).where(User.id == _id))
+    result = await db.execute(select(User).where(User.id == _id).options(*USER_LOAD_OPTIONS))
     existing_user = result.scalar()
     return existing_user
 
@@ -25,7 +31,7 @@ async def update_refresh_token(
 
 
 async def get_user_by_email(email: str, db: AsyncSession) -> User:
-    query = select(User).where(User.email == email)
+    query = select(User).where(User.email == email).options(*USER_LOAD_OPTIONS)
     result = await db.execute(query)
     existing_user = result.scalar()
     return existing_user
@@ -47,15 +53,26 @@ async def create_user(user_info: UserCreate, db: AsyncSession):
 
 
 async def get_user_by_username(username: str, db: AsyncSession) -> User:
-    query = select(User).where(User.username == username)
+    query = select(User).where(User.username == username).options(*USER_LOAD_OPTIONS)
     result = await db.execute(query)
     existing_user = result.scalar()
     return existing_user
 
 
-async def get_user_page(user_id: str, user: User, db: AsyncSession):
-    query = select(User).where(User.id == user_id)
+async def get_user_page(
+    user_id: str,
+    user: User,
+    limit: int,
+    cursor: str | None,
+    backwards: bool,
+    db: AsyncSession,
+):
+    query = select(User).where(User.id == user_id).options(*USER_LOAD_OPTIONS)
     result = await db.execute(query)
     existing_user = result.scalar()
-    images = existing_user.images
-    return existing_user, images
+    if existing_user is None:
+        return None, [], None, None
+    images, next_cursor, prev_cursor = await ImageQuery.get_owner_page(
+        existing_user.id, limit, cursor, backwards, db
+    )
+    return existing_user, images, next_cursor, prev_cursor
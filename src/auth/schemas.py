@@ -42,4 +42,35 @@ class RequestVerifyEmailOrForgetPassword(BaseModel):
         from_attributes: True
 
 
+class PermissionFlags(BaseModel):
+    can_add_image: bool = False
+    can_update_image: bool = False
+    can_delete_image: bool = False
+    can_add_tag: bool = False
+    can_update_tag: bool = False
+    can_delete_tag: bool = False
+    can_add_comment: bool = False
+    can_update_comment: bool = False
+    can_delete_comment: bool = False
 
+    class Config:
+        from_attributes: True
+
+
+class UserPrincipal(BaseModel):
+    """
+    The compact view of the authenticated user that routes receive.
+
+    It carries everything the routes and the access service read from the current
+    user, so it can be cached and served without a database query.
+    """
+    id: uuid.UUID
+    username: str
+    email: str
+    avatar: str | None
+    is_verified: bool
+    is_superuser: bool
+    permission: PermissionFlags
+
+    class Config:
+        from_attributes: True
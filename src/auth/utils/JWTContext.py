@@ -7,7 +7,9 @@ from fastapi import Depends, HTTPException, status
 from passlib.context import CryptContext
 from jose import jwt, JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
+from src.auth.schemas import UserPrincipal
 from src.config import settings
+from src.database.cache.user_cache import user_cache
 from src.database.sql.models import User
 from src.database.sql.postgres import database
 import src.auth.repository as repo
@@ -56,9 +58,34 @@ class JWTContext:
             user.is_verified = True
             await db.commit()
             await db.refresh(user)
+            await user_cache.invalidate(user.id)
 
         return await self._token_response(user, token, token_type)
 
+    async def resolve_principal(self, token: str, db: AsyncSession) -> UserPrincipal:
+        """
+        Resolve the user of an access token.
+
+        The principal is served from the user cache; the database is queried only
+        on a miss, and the result is cached for the next requests.
+
+        :param token: str: The access token.
+        :param db: AsyncSession: The database session.
+        :return: The principal of the token's user.
+        """
+        payload = await self._verify_token(token, TokenType.ACCESS)
+        principal, ticket = await user_cache.get(payload["uid"])
+        if principal is not None:
+            return principal
+        user = await repo.id_user_auth(payload["uid"], db=db)
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
+            )
+        principal = UserPrincipal.model_validate(user, from_attributes=True)
+        await user_cache.set(principal, ticket)
+        return principal
+
     async def _verify_token(self, token: str, token_type: TokenType) -> dict:
         try:
             payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
@@ -10,6 +10,7 @@ from src.auth.utils.JWTContext import JWTContext
 import src.auth.repository as repo
 from src.auth.utils.email import send_email_verification, send_email_for_reset_pswd
 from src.config import settings
+from src.database.cache.user_cache import user_cache
 
 
 class Auth:
@@ -20,7 +21,7 @@ class Auth:
         db: AsyncSession,
         token: str = Depends(jwt_settings.oauth2_scheme),
     ):
-        return await self.jwt_settings.decode_token(token, TokenType.ACCESS, db=db)
+        return await self.jwt_settings.resolve_principal(token, db=db)
 
     async def register_user(
         self,
@@ -120,6 +121,7 @@ class Auth:
         user.hashed_password = new_hashed_password
         await db.commit()
         await db.refresh(user)
+        await user_cache.invalidate(user.id)
         return {"detail": "Password changed"}
 
     async def _get_user_by_email(self, email: str, db: AsyncSession):
@@ -1,6 +1,9 @@
+from typing import Literal
+
 from fastapi import (
     APIRouter,
     Depends,
+    Query,
     Request,
     status,
     Response,
@@ -13,9 +16,11 @@ from src.auth.schemas import (
     UserCreate,
     OnLoginResponse,
     RequestVerifyEmailOrForgetPassword,
+    UserPage,
 )
 from src.auth.service import user_service, current_active_user
 from src.database.sql.models import User
+from src.database.sql.pagination import set_cursor_headers
 from src.database.sql.postgres import database
 
 
@@ -154,13 +159,23 @@ class AuthRoutes:
     def get_user_page(self):
         router = APIRouter()
 
-        @router.get("/user/{user_id}", status_code=status.HTTP_200_OK)
+        @router.get(
+            "/user/{user_id}", status_code=status.HTTP_200_OK, response_model=UserPage
+        )
         async def get_user_page(
             user_id: str,
+            response: Response,
+            limit: int = Query(default=36, ge=1, le=100),
+            cursor: str | None = None,
+            direction: Literal["next", "prev"] = "next",
             user: User = Depends(current_active_user),
             db: AsyncSession = Depends(database),
         ):
-            return await self.user_service.get_user_page(user_id, user, db)
+            page, next_cursor, prev_cursor = await self.user_service.get_user_page(
+                user_id, user, limit, cursor, direction == "prev", db
+            )
+            set_cursor_headers(response, next_cursor, prev_cursor)
+            return page
 
         @router.get("/me", status_code=status.HTTP_200_OK, response_model=UserRead)
         async def get_me(
@@ -1,7 +1,30 @@
-from sqlalchemy import select
+from datetime import datetime
+
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.database.cache.events import event_broker
+from src.database.cache.feed_cache import feed_cache
+from src.database.cache.rankings import rankings
 from src.database.sql.models import Comment, User, Image
+from src.database.sql.pagination import (
+    decode_cursor,
+    keyset_order,
+    keyset_page,
+    keyset_where,
+)
+from src.image.repository import ImageQuery, search_append, RANKING_COLUMNS
+
+
+def comment_event(comment: Comment) -> dict:
+    return {
+        "id": comment.id,
+        "owner_id": comment.owner_id,
+        "image_id": comment.image_id,
+        "text": comment.text,
+        "created_at": comment.created_at,
+        "updated_at": comment.updated_at,
+    }
 
 
 class CommentQuery:
@@ -11,6 +34,7 @@ class CommentQuery:
     Functions:
         - create: Create a new comment.
         - read: Retrieve a comment by its ID.
+        - list_for_image: Retrieve a page of the comments of an image.
         - update: Update a comment's text.
         - delete: Delete a comment.
     """
@@ -27,8 +51,24 @@ class CommentQuery:
         """
         comment = Comment(**body.model_dump(), owner_id=user.id)
         db.add(comment)
+        counters = await db.execute(
+            update(Image)
+            .where(Image.id == comment.image_id)
+            .values(
+                comments_count=Image.comments_count + 1,
+                search_vector=search_append(comment.text, "C"),
+            )
+            .returning(*RANKING_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+        counters = counters.one()
         await db.commit()
         await db.refresh(comment)
+        await feed_cache.invalidate()
+        await rankings.update(comment.image_id, counters)
+        await event_broker.publish(
+            comment.image_id, event_broker.COMMENT_CREATED, comment_event(comment)
+        )
         return comment
 
     @staticmethod
@@ -45,6 +85,55 @@ class CommentQuery:
         comment = comment.scalar_one_or_none()
         return comment
 
+    @staticmethod
+    async def list_for_image(
+            image_id: int,
+            limit: int,
+            cursor: str | None,
+            backwards: bool,
+            with_owner: bool,
+            db: AsyncSession,
+    ) -> tuple[list, str | None, str | None]:
+        """
+        Retrieve a page of the comments of an image, oldest first.
+
+        Pages are fetched by keyset over (created_at, id), answered by the
+        (image_id, created_at, id) index, so only one page of comments is ever read.
+
+        :param image_id: int: The ID of the image.
+        :param limit: int: The page size.
+        :param cursor: str | None: The cursor returned with a previous page.
+        :param backwards: bool: Whether to fetch the page before the cursor.
+        :param with_owner: bool: Whether to add the username of every comment's owner.
+        :param db: AsyncSession: The database session.
+        :return: The comment rows, the next cursor and the previous cursor.
+        :raises ValueError: If the cursor is malformed.
+        """
+        columns = (Comment.created_at, Comment.id)
+        stmt = (
+            select(
+                Comment.id,
+                Comment.owner_id,
+                Comment.image_id,
+                Comment.text,
+                Comment.created_at,
+                Comment.updated_at,
+            )
+            .where(Comment.image_id == image_id)
+            .order_by(*keyset_order(columns, False, backwards))
+        )
+        if with_owner:
+            stmt = stmt.add_columns(User.username.label("owner_username")).join(
+                User, User.id == Comment.owner_id
+            )
+        if cursor:
+            values = decode_cursor(cursor, datetime, int)
+            stmt = stmt.where(keyset_where(columns, values, False, backwards))
+        comments = await db.execute(stmt.limit(limit + 1))
+        return keyset_page(
+            comments.all(), limit, cursor, backwards, lambda row: (row.created_at, row.id)
+        )
+
     @staticmethod
     async def update(comment, body, db) -> Comment | None:
         """
@@ -56,8 +145,13 @@ class CommentQuery:
         :return: The updated comment.
         """
         comment.text = body.text
+        await db.flush()
+        await ImageQuery.refresh_search_vector(comment.image_id, db)
         await db.commit()
         await db.refresh(comment)
+        await event_broker.publish(
+            comment.image_id, event_broker.COMMENT_UPDATED, comment_event(comment)
+        )
         return comment
 
     @staticmethod
@@ -70,4 +164,19 @@ class CommentQuery:
         :return: None.
         """
         await db.delete(comment)
+        counters = await db.execute(
+            update(Image)
+            .where(Image.id == comment.image_id)
+            .values(comments_count=Image.comments_count - 1)
+            .returning(*RANKING_COLUMNS)
+        )
+        counters = counters.one()
+        await ImageQuery.refresh_search_vector(comment.image_id, db)
         await db.commit()
+        await feed_cache.invalidate()
+        await rankings.update(comment.image_id, counters)
+        await event_broker.publish(
+            comment.image_id,
+            event_broker.COMMENT_DELETED,
+            {"id": comment.id, "image_id": comment.image_id},
+        )
@@ -5,23 +5,28 @@ This module contains FastAPI routes related to comments on images.
 
 Routes:
 - create_comment: Create a new comment for an image.
+- get_image_comments: Retrieve a page of the comments of an image.
 - get_comment: Retrieve a specific comment by its ID.
 - update_comment: Update an existing comment.
 - delete_comment: Delete a comment.
 """
 
-from fastapi import APIRouter, Path, Depends, status, HTTPException
+from typing import Literal
+
+from fastapi import APIRouter, Path, Depends, status, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.sql.models import User
 from src.auth.service import current_active_user
 from src.comment.repository import CommentQuery
-from src.image.routes import get_image
+from src.image.routes import find_image
 from src.comment.schemas import (
+    CommentListItemResponse,
     CommentSchemaRequest,
     CommentSchemaResponse,
     CommentUpdateSchemaRequest,
 )
 from src.auth.utils.access import access_service
+from src.database.sql.pagination import set_cursor_headers
 from src.database.sql.postgres import database
 
 router = APIRouter(prefix="/comment", tags=["comments"])
@@ -46,12 +51,55 @@ async def create_comment(
     :param db: AsyncSession: The database session.
     :return: The created comment.
     """
-    await get_image(body.image_id, user, db)
+    await find_image(body.image_id, db)
     access_service("can_add_comment", user)
     comment = await CommentQuery.create(body, user, db)
     return comment
 
 
+@router.get(
+    "/image/{image_id}",
+    response_model=list[CommentListItemResponse],
+    response_model_exclude_unset=True,
+)
+async def get_image_comments(
+    response: Response,
+    image_id: int = Path(ge=1),
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: str | None = None,
+    direction: Literal["next", "prev"] = "next",
+    with_owner: bool = False,
+    user: User = Depends(current_active_user),
+    db: AsyncSession = Depends(database),
+):
+    """
+    Get a page of the comments of an image, oldest first.
+
+    Cursors for the next and previous pages are returned in the X-Next-Cursor and
+    X-Prev-Cursor headers.
+
+    :param response: Response: The outgoing response, used for cursor headers.
+    :param image_id: int: The ID of the image.
+    :param limit: int: The page size.
+    :param cursor: str | None: The cursor of the page to continue from.
+    :param direction: str: "next" or "prev", relative to the cursor.
+    :param with_owner: bool: Whether to include the username of every comment's owner.
+    :param user: User: The current user.
+    :param db: AsyncSession: The database session.
+    :return: A list of comments.
+    """
+    try:
+        comments, next_cursor, prev_cursor = await CommentQuery.list_for_image(
+            image_id, limit, cursor, direction == "prev", with_owner, db
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor!"
+        )
+    set_cursor_headers(response, next_cursor, prev_cursor)
+    return [CommentListItemResponse(**comment._mapping) for comment in comments]
+
+
 @router.get("/{comment_id}", response_model=CommentSchemaResponse)
 async def get_comment(
     comment_id: int = Path(ge=1),
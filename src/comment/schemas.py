@@ -24,3 +24,7 @@ class CommentSchemaResponse(CommentSchemaRequest):
 
     class Config:
         from_attributes: True
+
+
+class CommentListItemResponse(CommentSchemaResponse):
+    owner_username: str | None = None
@@ -15,6 +15,38 @@ class Settings(BaseSettings):
     redis_host: str = Field()
     redis_port: str = Field()
 
+    feed_cache_ttl: int = Field(default=30)
+
+    celery_broker_url: str = Field(default="")
+    job_ttl: int = Field(default=86400)
+    transform_cache_ttl: int = Field(default=604800)
+    transform_backend: str = Field(default="local")
+    transform_workers: int = Field(default=0)
+    transform_max_dimension: int = Field(default=4096)
+    batch_upload_concurrency: int = Field(default=8)
+    image_variants: dict[str, str] = Field(
+        default={
+            "thumb": "c_fill,g_auto,w_200,h_200",
+            "medium": "c_limit,w_800",
+            "large": "c_limit,w_1600",
+        }
+    )
+    image_variant_formats: list[str] = Field(default=["webp", "avif"])
+    batch_upload_max_files: int = Field(default=50)
+    direct_upload_ttl: int = Field(default=900)
+    ranking_prior_mean: float = Field(default=3.0)
+    ranking_prior_weight: int = Field(default=10)
+    trending_decay_seconds: int = Field(default=45000)
+    event_queue_size: int = Field(default=100)
+    event_heartbeat: float = Field(default=15)
+    tag_suggest_candidates: int = Field(default=200)
+    tag_stats_refresh_interval: int = Field(default=300)
+    tag_stats_batch_size: int = Field(default=500)
+    tag_stats_lock_ttl: int = Field(default=900)
+    user_cache_ttl: int = Field(default=300)
+    user_cache_local_ttl: float = Field(default=5)
+    user_cache_local_size: int = Field(default=10000)
+
     secret_key: str = Field()
     algorithm: str = Field()
 
@@ -28,6 +60,12 @@ class Settings(BaseSettings):
     cloudinary_name: str = Field()
     cloudinary_api_key: int = Field()
     cloudinary_api_secret: str = Field()
+    cloudinary_api_url: str = Field(default="https://api.cloudinary.com")
+    cloudinary_delivery_url: str = Field(default="https://res.cloudinary.com")
+    cloudinary_timeout: float = Field(default=30)
+    cloudinary_retries: int = Field(default=3)
+    cloudinary_backoff: float = Field(default=0.5)
+    cloudinary_pool_size: int = Field(default=100)
 
     ttl_access_token: int = Field()
     ttl_refresh_token: int = Field()
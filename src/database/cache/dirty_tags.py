@@ -0,0 +1,64 @@
+"""
+Dirty Tags
+
+This module tracks the tags whose statistics are out of date. Tag writes mark the
+names of the tags they attach or detach, and the tag stats refresh takes them
+off the set in batches.
+
+Class:
+- DirtyTags: Mark, take and return dirty tag names.
+"""
+from redis.exceptions import RedisError
+
+from src.database.cache.redis_conn import cache_database
+
+
+class DirtyTags:
+    KEY = "tag_stats:dirty"
+
+    async def mark(self, names: list[str]) -> None:
+        """
+        Mark tags as changed.
+
+        :param names: list[str]: The names of the tags.
+        :return: None.
+        """
+        if not names:
+            return
+        try:
+            redis = await cache_database()
+            await redis.sadd(self.KEY, *names)
+        except RedisError as e:
+            print(f"Failed to mark tags {names} for a stats refresh: {e}")
+
+    async def take(self, count: int) -> list[str]:
+        """
+        Take up to count dirty tags off the set.
+
+        :param count: int: The maximum number of tags.
+        :return: The names of the taken tags.
+        """
+        redis = await cache_database()
+        names = await redis.spop(self.KEY, count)
+        return [name.decode() for name in names or []]
+
+    async def restore(self, names: list[str]) -> None:
+        """
+        Put taken tags back, e.g. after a failed refresh.
+
+        :param names: list[str]: The names of the tags.
+        :return: None.
+        """
+        await self.mark(names)
+
+    async def clear(self) -> None:
+        """
+        Forget every dirty tag, e.g. after a full refresh.
+
+        :return: None.
+        """
+        redis = await cache_database()
+        await redis.delete(self.KEY)
+
+
+dirty_tags = DirtyTags()
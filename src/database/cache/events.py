@@ -0,0 +1,150 @@
+"""
+Image Events
+
+This module fans out real-time image events (new, changed and deleted comments,
+likes) to Server-Sent Events subscribers.
+
+Writers publish events to a Redis pub/sub channel per image, so every API worker
+process receives them. Each process keeps a single pub/sub connection and
+subscribes to a channel only while it has local subscribers for that image. The
+connection and its reader task exist only while there is at least one subscriber.
+Every incoming message is turned into a Server-Sent Events frame once, and the
+frame is copied to a small bounded queue per subscriber. A slow client loses
+events rather than growing memory, so idle subscribers cost one queue each and
+no Redis connection.
+
+Class:
+- EventBroker: Publish image events and subscribe to them.
+"""
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from redis.exceptions import RedisError
+
+from src.config import settings
+from src.database.cache.redis_conn import cache_database
+
+
+class EventBroker:
+    COMMENT_CREATED = "comment.created"
+    COMMENT_UPDATED = "comment.updated"
+    COMMENT_DELETED = "comment.deleted"
+    LIKE_CREATED = "like.created"
+
+    def __init__(self, queue_size: int = settings.event_queue_size):
+        self.queue_size = queue_size
+        self.subscribers: dict[str, set[asyncio.Queue]] = {}
+        self.pubsub = None
+        self.reader: asyncio.Task | None = None
+        self.lock = asyncio.Lock()
+
+    @staticmethod
+    def _channel(image_id: int) -> str:
+        return f"image_events:{image_id}"
+
+    async def publish(self, image_id: int, event: str, data: dict) -> None:
+        """
+        Publish an event to every subscriber of an image, in every worker process.
+
+        :param image_id: int: The ID of the image the event belongs to.
+        :param event: str: The event type, e.g. EventBroker.COMMENT_CREATED.
+        :param data: dict: The JSON-serializable event data.
+        :return: None.
+        """
+        message = json.dumps({"event": event, "data": data}, default=str)
+        try:
+            redis = await cache_database()
+            await redis.publish(self._channel(image_id), message)
+        except RedisError as e:
+            print(f"Failed to publish {event} for image {image_id}: {e}")
+
+    @asynccontextmanager
+    async def subscribe(self, image_id: int) -> AsyncIterator[asyncio.Queue]:
+        """
+        Subscribe to the events of an image.
+
+        :param image_id: int: The ID of the image.
+        :return: A queue that receives the events as SSE frames.
+        """
+        channel = self._channel(image_id)
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        async with self.lock:
+            if channel not in self.subscribers:
+                if self.pubsub is None:
+                    redis = await cache_database()
+                    self.pubsub = redis.pubsub(ignore_subscribe_messages=True)
+                await self.pubsub.subscribe(channel)
+                self.subscribers[channel] = set()
+            self.subscribers[channel].add(queue)
+            if self.reader is None or self.reader.done():
+                self.reader = asyncio.create_task(self._read())
+        try:
+            yield queue
+        finally:
+            async with self.lock:
+                queues = self.subscribers.get(channel)
+                if queues is not None:
+                    queues.discard(queue)
+                    if not queues:
+                        del self.subscribers[channel]
+                        if not self.subscribers:
+                            await self._stop()
+                        else:
+                            try:
+                                await self.pubsub.unsubscribe(channel)
+                            except RedisError:
+                                pass
+
+    @staticmethod
+    def _frame(message: bytes) -> str:
+        message = json.loads(message)
+        return f"event: {message['event']}\ndata: {json.dumps(message['data'])}\n\n"
+
+    async def _read(self) -> None:
+        while True:
+            try:
+                message = await self.pubsub.get_message(timeout=None)
+            except RedisError as e:
+                print(f"Image event stream interrupted: {e}")
+                await asyncio.sleep(1)
+                continue
+            if message is None:
+                continue
+            queues = tuple(self.subscribers.get(message["channel"].decode(), ()))
+            if not queues:
+                continue
+            try:
+                frame = self._frame(message["data"])
+            except (ValueError, KeyError, TypeError):
+                continue
+            for queue in queues:
+                try:
+                    queue.put_nowait(frame)
+                except asyncio.QueueFull:
+                    pass
+
+    async def _stop(self) -> None:
+        if self.reader is not None:
+            self.reader.cancel()
+            await asyncio.gather(self.reader, return_exceptions=True)
+            self.reader = None
+        if self.pubsub is not None:
+            try:
+                await self.pubsub.reset()
+            except RedisError:
+                pass
+            self.pubsub = None
+
+    async def close(self) -> None:
+        """
+        Stop the reader task and close the pub/sub connection.
+
+        :return: None.
+        """
+        await self._stop()
+        self.subscribers.clear()
+
+
+event_broker = EventBroker()
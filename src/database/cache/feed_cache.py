@@ -0,0 +1,99 @@
+"""
+Feed Cache
+
+This module contains the Redis cache for feed pages.
+
+Pages are stored under keys that embed a global feed version. Any write that
+changes what the feed shows bumps the version, which makes every cached page
+unreachable at once; stale pages then simply expire with their TTL.
+
+A page is written back under the key it was missed on. If the version is bumped
+while the page is being built, the page lands under the old version and is never
+served.
+
+Class:
+- FeedCache: Read, write and invalidate cached feed pages.
+"""
+import json
+
+from redis.exceptions import RedisError
+
+from src.config import settings
+from src.database.cache.redis_conn import cache_database
+
+
+class FeedCache:
+    VERSION_KEY = "feed:version"
+    HITS_KEY = "feed:stats:hits"
+    MISSES_KEY = "feed:stats:misses"
+
+    def __init__(self, ttl: int = settings.feed_cache_ttl):
+        self.ttl = ttl
+
+    async def _key(self, redis, *parts) -> str:
+        version = await redis.get(self.VERSION_KEY) or b"0"
+        return f"feed:v{version.decode()}:" + ":".join(str(part) for part in parts)
+
+    async def get(self, *parts) -> tuple[dict | None, str | None]:
+        """
+        Get a cached feed page.
+
+        :param parts: The values that identify the page (limit, cursor, ...).
+        :return: The cached page or None on a miss, and the key to store the page
+            under, or None if the cache is unavailable.
+        """
+        try:
+            redis = await cache_database()
+            key = await self._key(redis, *parts)
+            page = await redis.get(key)
+            await redis.incr(self.HITS_KEY if page else self.MISSES_KEY)
+        except RedisError:
+            return None, None
+        return (json.loads(page) if page else None), key
+
+    async def set(self, page: dict, key: str | None) -> None:
+        """
+        Cache a feed page.
+
+        :param page: dict: A JSON-serializable page.
+        :param key: str | None: The key returned by the get call that missed.
+        :return: None.
+        """
+        if key is None:
+            return
+        try:
+            redis = await cache_database()
+            await redis.set(key, json.dumps(page), ex=self.ttl)
+        except RedisError:
+            pass
+
+    async def invalidate(self) -> None:
+        """
+        Invalidate every cached feed page by bumping the feed version.
+
+        :return: None.
+        """
+        try:
+            redis = await cache_database()
+            await redis.incr(self.VERSION_KEY)
+        except RedisError:
+            pass
+
+    async def stats(self) -> dict:
+        """
+        Get the hit/miss counters of the cache.
+
+        :return: A dictionary with hits, misses and the current version.
+        """
+        redis = await cache_database()
+        hits, misses, version = await redis.mget(
+            self.HITS_KEY, self.MISSES_KEY, self.VERSION_KEY
+        )
+        return {
+            "hits": int(hits or 0),
+            "misses": int(misses or 0),
+            "version": int(version or 0),
+        }
+
+
+feed_cache = FeedCache()
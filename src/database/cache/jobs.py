@@ -0,0 +1,105 @@
+"""
+Job Store
+
+This module keeps the status of background jobs in Redis, so request handlers
+can report on jobs without talking to the Celery result backend.
+
+Class:
+- JobStore: Create jobs, stash their payloads and track their status.
+"""
+import json
+import uuid
+from datetime import datetime
+
+from src.config import settings
+from src.database.cache.redis_conn import cache_database
+
+
+class JobStore:
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    def __init__(self, ttl: int = settings.job_ttl):
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(job_id: str) -> str:
+        return f"job:{job_id}"
+
+    async def create(self, kind: str, owner_id, payload: bytes | None = None) -> str:
+        """
+        Create a queued job.
+
+        :param kind: str: The kind of job, e.g. "upload".
+        :param owner_id: The ID of the user who started the job.
+        :param payload: bytes | None: Data the worker needs, e.g. the uploaded file.
+        :return: The job ID.
+        """
+        job_id = str(uuid.uuid4())
+        redis = await cache_database()
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                self._key(job_id),
+                mapping={
+                    "kind": kind,
+                    "owner_id": str(owner_id),
+                    "status": self.QUEUED,
+                    "created_at": datetime.utcnow().isoformat(),
+                },
+            )
+            pipe.expire(self._key(job_id), self.ttl)
+            if payload is not None:
+                pipe.set(f"{self._key(job_id)}:payload", payload, ex=self.ttl)
+            await pipe.execute()
+        return job_id
+
+    async def pop_payload(self, job_id: str) -> bytes | None:
+        """
+        Get and delete the payload of a job.
+
+        :param job_id: str: The job ID.
+        :return: The payload or None if it expired.
+        """
+        redis = await cache_database()
+        return await redis.getdel(f"{self._key(job_id)}:payload")
+
+    async def set_status(
+            self, job_id: str, status: str, result: dict | None = None, error: str | None = None
+    ) -> None:
+        """
+        Update the status of a job.
+
+        :param job_id: str: The job ID.
+        :param status: str: The new status.
+        :param result: dict | None: The result of a succeeded job.
+        :param error: str | None: The error of a failed job.
+        :return: None.
+        """
+        mapping = {"status": status, "updated_at": datetime.utcnow().isoformat()}
+        if result is not None:
+            mapping["result"] = json.dumps(result)
+        if error is not None:
+            mapping["error"] = error
+        redis = await cache_database()
+        await redis.hset(self._key(job_id), mapping=mapping)
+
+    async def get(self, job_id: str) -> dict | None:
+        """
+        Get a job.
+
+        :param job_id: str: The job ID.
+        :return: The job as a dictionary or None if it does not exist.
+        """
+        redis = await cache_database()
+        job = await redis.hgetall(self._key(job_id))
+        if not job:
+            return None
+        job = {key.decode(): value.decode() for key, value in job.items()}
+        job["job_id"] = job_id
+        job["result"] = json.loads(job["result"]) if "result" in job else None
+        return job
+
+
+job_store = JobStore()
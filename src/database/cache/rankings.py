@@ -0,0 +1,237 @@
+"""
+Image Rankings
+
+This module keeps the top-rated and trending image rankings in Redis sorted sets.
+
+Scores are recomputed for one image whenever its likes, ratings or comments
+change, so reading a ranking page is a ZREVRANGE and never sorts the images table.
+
+- top: a Bayesian average rating, which pulls images with few ratings towards a
+  prior mean so a single five-star rating does not outrank hundreds of fours.
+- trending: log10 of the engagement (likes, comments and ratings) plus the
+  creation time divided by a decay period, so every decay period of age costs an
+  image ten times its engagement.
+
+Class:
+- Rankings: Update, remove, page through and rebuild the rankings.
+"""
+import math
+from datetime import datetime, timezone
+from typing import AsyncIterable, Iterable
+
+from redis.exceptions import RedisError
+
+from src.config import settings
+from src.database.cache.redis_conn import cache_database
+from src.database.sql.pagination import encode_cursor, decode_cursor
+
+# Read the entries that follow a (score, member) cursor, whether or not the member
+# is still ranked with that score. Entries are ordered by score, then ties by
+# member in byte order, both descending; the tied members at or before the cursor
+# member are found by binary search and skipped.
+# KEYS: ranking key. ARGV: cursor score, cursor member, number of entries.
+PAGE_SCRIPT = """
+local function less(a, b)
+    for i = 1, math.min(#a, #b) do
+        local x, y = string.byte(a, i), string.byte(b, i)
+        if x ~= y then
+            return x < y
+        end
+    end
+    return #a < #b
+end
+local lo = redis.call('ZCOUNT', KEYS[1], '(' .. ARGV[1], '+inf')
+local hi = lo + redis.call('ZCOUNT', KEYS[1], ARGV[1], ARGV[1])
+while lo < hi do
+    local mid = math.floor((lo + hi) / 2)
+    local member = redis.call('ZREVRANGE', KEYS[1], mid, mid)[1]
+    if less(member, ARGV[2]) then
+        hi = mid
+    else
+        lo = mid + 1
+    end
+end
+return redis.call('ZREVRANGE', KEYS[1], lo, lo + tonumber(ARGV[3]) - 1, 'WITHSCORES')
+"""
+
+
+class Rankings:
+    TOP = "top"
+    TRENDING = "trending"
+
+    def __init__(
+            self,
+            prior_mean: float = settings.ranking_prior_mean,
+            prior_weight: int = settings.ranking_prior_weight,
+            decay: int = settings.trending_decay_seconds,
+    ):
+        self.prior_mean = prior_mean
+        self.prior_weight = prior_weight
+        self.decay = decay
+        self.page_script = None
+
+    @staticmethod
+    def _key(ranking: str) -> str:
+        return f"ranking:{ranking}"
+
+    def top_score(self, rating_sum: int, rating_count: int) -> float:
+        """
+        Compute the Bayesian average rating of an image.
+
+        :param rating_sum: int: The sum of the image's ratings.
+        :param rating_count: int: The number of ratings of the image.
+        :return: The top ranking score.
+        """
+        return (self.prior_mean * self.prior_weight + rating_sum) / (
+            self.prior_weight + rating_count
+        )
+
+    def trending_score(
+            self, likes: int, comments: int, ratings: int, created_at: datetime
+    ) -> float:
+        """
+        Compute the time-decayed hotness of an image.
+
+        :param likes: int: The number of likes.
+        :param comments: int: The number of comments.
+        :param ratings: int: The number of ratings.
+        :param created_at: datetime: When the image was created.
+        :return: The trending ranking score.
+        """
+        engagement = likes + 2 * comments + ratings
+        created_ts = created_at.replace(tzinfo=created_at.tzinfo or timezone.utc).timestamp()
+        return math.log10(max(engagement, 1)) + created_ts / self.decay
+
+    def _scores(self, image) -> dict[str, float]:
+        return {
+            self.TOP: self.top_score(image.rating_sum, image.rating_count),
+            self.TRENDING: self.trending_score(
+                image.likes_count, image.comments_count, image.rating_count, image.created_at
+            ),
+        }
+
+    async def update(self, image_id: int, image) -> None:
+        """
+        Recompute the scores of an image.
+
+        :param image_id: int: The ID of the image.
+        :param image: An image or row with rating_sum, rating_count, likes_count,
+            comments_count and created_at.
+        :return: None.
+        """
+        await self.update_many([(image_id, image)])
+
+    async def update_many(self, images: Iterable[tuple[int, object]]) -> None:
+        """
+        Recompute the scores of many images in one round trip.
+
+        :param images: Iterable: Pairs of image ID and image or row, as for update.
+        :return: None.
+        """
+        try:
+            redis = await cache_database()
+            async with redis.pipeline(transaction=False) as pipe:
+                for image_id, image in images:
+                    for ranking, score in self._scores(image).items():
+                        pipe.zadd(self._key(ranking), {str(image_id): score})
+                await pipe.execute()
+        except RedisError:
+            pass
+
+    async def remove(self, image_id: int) -> None:
+        """
+        Remove an image from every ranking.
+
+        :param image_id: int: The ID of the image.
+        :return: None.
+        """
+        try:
+            redis = await cache_database()
+            async with redis.pipeline(transaction=False) as pipe:
+                for ranking in (self.TOP, self.TRENDING):
+                    pipe.zrem(self._key(ranking), str(image_id))
+                await pipe.execute()
+        except RedisError:
+            pass
+
+    async def page(
+            self, ranking: str, limit: int, cursor: str | None
+    ) -> tuple[list[int], str | None]:
+        """
+        Get a page of a ranking, best first.
+
+        The cursor holds the score and ID of the last image of the previous page.
+        The page continues right after the position that image had, so images with
+        the same score are neither skipped nor repeated, even if the image has
+        since left the ranking or changed its score.
+
+        :param ranking: str: Rankings.TOP or Rankings.TRENDING.
+        :param limit: int: The page size.
+        :param cursor: str | None: The cursor returned with a previous page.
+        :return: The image IDs of the page and the next cursor.
+        :raises ValueError: If the cursor is malformed.
+        """
+        key = self._key(ranking)
+        redis = await cache_database()
+        if cursor is None:
+            entries = await redis.zrevrange(key, 0, limit, withscores=True)
+        else:
+            score, image_id = decode_cursor(cursor, float, int)
+            if self.page_script is None:
+                self.page_script = redis.register_script(PAGE_SCRIPT)
+            entries = await self.page_script(
+                keys=[key], args=[repr(score), str(image_id), limit + 1]
+            )
+            entries = list(zip(entries[::2], entries[1::2]))
+        entries = [(int(member), float(score)) for member, score in entries]
+        next_cursor = None
+        if len(entries) > limit:
+            entries = entries[:limit]
+            next_cursor = encode_cursor(entries[-1][1], entries[-1][0])
+        return [image_id for image_id, _ in entries], next_cursor
+
+    async def rebuild(
+            self, images: AsyncIterable[tuple[int, object]], batch_size: int = 1000
+    ) -> int:
+        """
+        Rebuild every ranking from scratch.
+
+        Scores are written to temporary keys that replace the live rankings at once.
+
+        :param images: AsyncIterable: Pairs of image ID and image or row, as for update.
+        :param batch_size: int: The number of images written per round trip.
+        :return: The number of ranked images.
+        """
+        redis = await cache_database()
+        rankings = (self.TOP, self.TRENDING)
+        staging = {ranking: f"{self._key(ranking)}:rebuild" for ranking in rankings}
+        await redis.delete(*staging.values())
+        total, batch = 0, {ranking: {} for ranking in rankings}
+
+        async def flush():
+            async with redis.pipeline(transaction=False) as pipe:
+                for ranking, scores in batch.items():
+                    if scores:
+                        pipe.zadd(staging[ranking], scores)
+                await pipe.execute()
+            for scores in batch.values():
+                scores.clear()
+
+        async for image_id, image in images:
+            for ranking, score in self._scores(image).items():
+                batch[ranking][str(image_id)] = score
+            total += 1
+            if total % batch_size == 0:
+                await flush()
+        await flush()
+        async with redis.pipeline(transaction=True) as pipe:
+            for ranking in rankings:
+                if total:
+                    pipe.rename(staging[ranking], self._key(ranking))
+                else:
+                    pipe.delete(self._key(ranking))
+            await pipe.execute()
+        return total
+
+
+rankings = Rankings()
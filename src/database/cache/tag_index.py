@@ -0,0 +1,160 @@
+"""
+Tag Index
+
+This module keeps a Redis index of tag names for autocomplete.
+
+- tags:lex is a sorted set where every member scores 0 and is
+  ``lower(name) + "\\x00" + name``. ZRANGEBYLEX then answers a case-insensitive
+  prefix lookup in O(log n + k), however many distinct tags there are.
+- tags:usage is a sorted set of tag name to the number of images using the tag,
+  used to rank the prefix matches.
+
+Only a bounded number of prefix matches is ranked per lookup
+(TAG_SUGGEST_CANDIDATES), so a short prefix ranks its lexicographically first
+candidates rather than every tag that starts with it.
+
+Class:
+- TagIndex: Maintain the index and suggest tags for a prefix.
+"""
+from typing import AsyncIterable
+
+from redis.exceptions import RedisError
+
+from src.config import settings
+from src.database.cache.redis_conn import cache_database
+
+# Decrement usage counts and drop tags no image uses any more, atomically.
+# ARGV holds (name, lex member) pairs.
+RELEASE_SCRIPT = """
+for i = 1, #ARGV, 2 do
+    local usage = redis.call('ZINCRBY', KEYS[2], -1, ARGV[i])
+    if tonumber(usage) <= 0 then
+        redis.call('ZREM', KEYS[2], ARGV[i])
+        redis.call('ZREM', KEYS[1], ARGV[i + 1])
+    end
+end
+return 1
+"""
+
+
+class TagIndex:
+    LEX_KEY = "tags:lex"
+    USAGE_KEY = "tags:usage"
+
+    def __init__(self, candidates: int = settings.tag_suggest_candidates):
+        self.candidates = candidates
+        self.release_script = None
+
+    @staticmethod
+    def _member(name: str) -> bytes:
+        return f"{name.lower()}\x00{name}".encode()
+
+    async def add(self, names: list[str]) -> None:
+        """
+        Count one more image for every tag and make the tags suggestible.
+
+        :param names: list[str]: The names of the tags attached to an image.
+        :return: None.
+        """
+        if not names:
+            return
+        try:
+            redis = await cache_database()
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.zadd(self.LEX_KEY, {self._member(name): 0 for name in names})
+                for name in names:
+                    pipe.zincrby(self.USAGE_KEY, 1, name)
+                await pipe.execute()
+        except RedisError as e:
+            print(f"Failed to index tags {names}: {e}")
+
+    async def remove(self, names: list[str]) -> None:
+        """
+        Count one image less for every tag and drop tags that are no longer used.
+
+        :param names: list[str]: The names of the tags detached from an image.
+        :return: None.
+        """
+        if not names:
+            return
+        try:
+            redis = await cache_database()
+            if self.release_script is None:
+                self.release_script = redis.register_script(RELEASE_SCRIPT)
+            args = []
+            for name in names:
+                args.extend((name, self._member(name)))
+            await self.release_script(keys=[self.LEX_KEY, self.USAGE_KEY], args=args)
+        except RedisError as e:
+            print(f"Failed to unindex tags {names}: {e}")
+
+    async def suggest(self, prefix: str, limit: int) -> list[tuple[str, int]]:
+        """
+        Suggest tags that start with a prefix, most used first.
+
+        :param prefix: str: The prefix, matched case-insensitively.
+        :param limit: int: The maximum number of suggestions.
+        :return: Pairs of tag name and usage count, or no suggestions if Redis is
+            unavailable.
+        """
+        start = prefix.lower().encode()
+        try:
+            redis = await cache_database()
+            members = await redis.zrangebylex(
+                self.LEX_KEY, b"[" + start, b"[" + start + b"\xff", start=0, num=self.candidates
+            )
+            if not members:
+                return []
+            names = [member.split(b"\x00", 1)[1].decode() for member in members]
+            usage = await redis.zmscore(self.USAGE_KEY, names)
+        except RedisError as e:
+            print(f"Failed to suggest tags for {prefix!r}: {e}")
+            return []
+        ranked = sorted(
+            zip(names, (int(count or 0) for count in usage)),
+            key=lambda item: (-item[1], item[0].lower()),
+        )
+        return ranked[:limit]
+
+    async def rebuild(self, tags: AsyncIterable[tuple[str, int]], batch_size: int = 1000) -> int:
+        """
+        Rebuild the index from scratch.
+
+        The index is written to temporary keys that replace the live ones at once.
+
+        :param tags: AsyncIterable: Pairs of tag name and usage count.
+        :param batch_size: int: The number of tags written per round trip.
+        :return: The number of indexed tags.
+        """
+        redis = await cache_database()
+        lex_key, usage_key = f"{self.LEX_KEY}:rebuild", f"{self.USAGE_KEY}:rebuild"
+        await redis.delete(lex_key, usage_key)
+        total, lex, usage = 0, {}, {}
+
+        async def flush():
+            if lex:
+                async with redis.pipeline(transaction=False) as pipe:
+                    pipe.zadd(lex_key, lex)
+                    pipe.zadd(usage_key, usage)
+                    await pipe.execute()
+            lex.clear()
+            usage.clear()
+
+        async for name, count in tags:
+            lex[self._member(name)] = 0
+            usage[name] = count
+            total += 1
+            if total % batch_size == 0:
+                await flush()
+        await flush()
+        async with redis.pipeline(transaction=True) as pipe:
+            if total:
+                pipe.rename(lex_key, self.LEX_KEY)
+                pipe.rename(usage_key, self.USAGE_KEY)
+            else:
+                pipe.delete(self.LEX_KEY, self.USAGE_KEY)
+            await pipe.execute()
+        return total
+
+
+tag_index = TagIndex()
@@ -0,0 +1,55 @@
+"""
+Transformation Cache
+
+This module contains the Redis cache of transformation results, keyed by the
+canonical hash of a source image and its transformation spec. Postgres keeps the
+durable copy in the image_transformations table; Redis answers repeats without a
+database round trip.
+
+Class:
+- TransformCache: Read and write cached transformation results.
+"""
+from redis.exceptions import RedisError
+
+from src.config import settings
+from src.database.cache.redis_conn import cache_database
+
+
+class TransformCache:
+    def __init__(self, ttl: int = settings.transform_cache_ttl):
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(spec_hash: str) -> str:
+        return f"transform:{spec_hash}"
+
+    async def get(self, spec_hash: str) -> str | None:
+        """
+        Get the URL of a cached transformation result.
+
+        :param spec_hash: str: The canonical transformation hash.
+        :return: The edited image URL or None on a miss.
+        """
+        try:
+            redis = await cache_database()
+            edited_url = await redis.get(self._key(spec_hash))
+        except RedisError:
+            return None
+        return edited_url.decode() if edited_url else None
+
+    async def set(self, spec_hash: str, edited_url: str) -> None:
+        """
+        Cache the URL of a transformation result.
+
+        :param spec_hash: str: The canonical transformation hash.
+        :param edited_url: str: The edited image URL.
+        :return: None.
+        """
+        try:
+            redis = await cache_database()
+            await redis.set(self._key(spec_hash), edited_url, ex=self.ttl)
+        except RedisError:
+            pass
+
+
+transform_cache = TransformCache()
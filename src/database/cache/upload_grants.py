@@ -0,0 +1,62 @@
+"""
+Upload Grants
+
+This module keeps track of the direct uploads the API has signed. A grant ties a
+public ID to the user it was issued to and can be redeemed once, so a signed
+upload cannot be recorded twice or by another user.
+
+Class:
+- UploadGrantStore: Issue and redeem upload grants.
+"""
+from redis.exceptions import WatchError
+
+from src.config import settings
+from src.database.cache.redis_conn import cache_database
+
+
+class UploadGrantStore:
+    def __init__(self, ttl: int = settings.direct_upload_ttl):
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(public_id: str) -> str:
+        return f"upload_grant:{public_id}"
+
+    async def issue(self, public_id: str, owner_id) -> None:
+        """
+        Record that a user may upload under a public ID.
+
+        :param public_id: str: The signed public ID.
+        :param owner_id: The ID of the user the upload was signed for.
+        :return: None.
+        """
+        redis = await cache_database()
+        await redis.set(self._key(public_id), str(owner_id), ex=self.ttl)
+
+    async def redeem(self, public_id: str, owner_id) -> bool:
+        """
+        Redeem the grant of a public ID.
+
+        The grant is removed only when it belongs to the given user.
+
+        :param public_id: str: The public ID of the upload.
+        :param owner_id: The ID of the user who completes the upload.
+        :return: True if the user held a valid grant for the public ID.
+        """
+        redis = await cache_database()
+        async with redis.pipeline(transaction=True) as pipe:
+            await pipe.watch(self._key(public_id))
+            granted_to = await pipe.get(self._key(public_id))
+            if granted_to is None or granted_to.decode() != str(owner_id):
+                await pipe.unwatch()
+                return False
+            pipe.multi()
+            pipe.delete(self._key(public_id))
+            try:
+                await pipe.execute()
+            except WatchError:
+                return False
+        return True
+
+
+upload_grants = UploadGrantStore()
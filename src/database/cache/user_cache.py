@@ -0,0 +1,197 @@
+"""
+User Cache
+
+This module contains the two-tier cache of authenticated user principals, keyed by
+user ID, so resolving the current user of a request needs no database query.
+
+- The first tier is a small in-process LRU whose entries live for a few seconds.
+  It answers bursts of requests from the same user without a network round trip.
+- The second tier is Redis, shared by every process, with a longer TTL.
+
+Invalidating a user drops both tiers in this process and the Redis entry. Other
+processes may keep serving their local copy until it expires, which bounds how
+long a change takes to be seen everywhere (USER_CACHE_LOCAL_TTL).
+
+A lookup that misses returns a ticket with the generation of the user and the
+cache version it saw. Invalidation bumps the generation, and set() writes only
+while both are unchanged, so a principal read from the database before an
+invalidation is never stored after it.
+
+Changes that affect many users at once, such as editing the flags of a permission
+role, are applied with clear(), which bumps the cache version.
+
+Class:
+- UserCache: Read, write and invalidate cached user principals.
+"""
+import json
+import time
+from collections import OrderedDict
+
+from pydantic import ValidationError
+from redis.exceptions import RedisError
+
+from src.auth.schemas import UserPrincipal
+from src.config import settings
+from src.database.cache.redis_conn import cache_database
+
+# Store a principal only if neither the cache version nor the generation of the
+# user changed since the lookup that missed.
+# KEYS: version key, generation key, entry key. ARGV: version, generation, entry, TTL.
+SET_SCRIPT = """
+if (redis.call('GET', KEYS[1]) or '0') ~= ARGV[1] then
+    return 0
+end
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[2] then
+    return 0
+end
+redis.call('SET', KEYS[3], ARGV[3], 'EX', ARGV[4])
+return 1
+"""
+
+
+class UserCache:
+    VERSION_KEY = "user:version"
+
+    def __init__(
+            self,
+            ttl: int = settings.user_cache_ttl,
+            local_ttl: float = settings.user_cache_local_ttl,
+            local_size: int = settings.user_cache_local_size,
+    ):
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.local_size = local_size
+        self.local: OrderedDict[str, tuple[float, UserPrincipal]] = OrderedDict()
+        self.local_generation = 0
+        self.set_script = None
+
+    @staticmethod
+    def _key(user_id: str) -> str:
+        return f"user:{user_id}"
+
+    @staticmethod
+    def _generation_key(user_id: str) -> str:
+        return f"user:generation:{user_id}"
+
+    def _get_local(self, user_id: str) -> UserPrincipal | None:
+        entry = self.local.get(user_id)
+        if entry is None:
+            return None
+        expires_at, principal = entry
+        if expires_at < time.monotonic():
+            del self.local[user_id]
+            return None
+        self.local.move_to_end(user_id)
+        return principal
+
+    def _set_local(self, user_id: str, principal: UserPrincipal) -> None:
+        self.local[user_id] = (time.monotonic() + self.local_ttl, principal)
+        self.local.move_to_end(user_id)
+        while len(self.local) > self.local_size:
+            self.local.popitem(last=False)
+
+    async def get(self, user_id) -> tuple[UserPrincipal | None, tuple]:
+        """
+        Get a cached user principal.
+
+        The version, the generation and the entry are read in one round trip.
+
+        :param user_id: The ID of the user.
+        :return: The cached principal or None on a miss, and the ticket to pass to
+            set() after loading the principal from the database.
+        """
+        user_id = str(user_id)
+        principal = self._get_local(user_id)
+        if principal is not None:
+            return principal, ()
+        local_generation = self.local_generation
+        try:
+            redis = await cache_database()
+            version, generation, cached = await redis.mget(
+                self.VERSION_KEY, self._generation_key(user_id), self._key(user_id)
+            )
+        except RedisError:
+            return None, (local_generation, None, None)
+        version = (version or b"0").decode()
+        generation = (generation or b"0").decode()
+        ticket = (local_generation, version, generation)
+        if not cached:
+            return None, ticket
+        try:
+            entry = json.loads(cached)
+            if entry["version"] != version:
+                return None, ticket
+            principal = UserPrincipal.model_validate(entry["principal"])
+        except (ValueError, KeyError, TypeError, ValidationError):
+            return None, ticket
+        self._set_local(user_id, principal)
+        return principal, ()
+
+    async def set(self, principal: UserPrincipal, ticket: tuple) -> None:
+        """
+        Cache a user principal in both tiers, unless it was invalidated since the
+        lookup that missed.
+
+        :param principal: UserPrincipal: The principal to cache.
+        :param ticket: tuple: The ticket returned by the get call that missed.
+        :return: None.
+        """
+        if not ticket:
+            return
+        user_id = str(principal.id)
+        local_generation, version, generation = ticket
+        if version is not None:
+            entry = json.dumps(
+                {"version": version, "principal": principal.model_dump(mode="json")}
+            )
+            try:
+                redis = await cache_database()
+                if self.set_script is None:
+                    self.set_script = redis.register_script(SET_SCRIPT)
+                stored = await self.set_script(
+                    keys=[self.VERSION_KEY, self._generation_key(user_id), self._key(user_id)],
+                    args=[version, generation, entry, self.ttl],
+                )
+            except RedisError:
+                stored = True
+            if not stored:
+                return
+        if local_generation == self.local_generation:
+            self._set_local(user_id, principal)
+
+    async def invalidate(self, user_id) -> None:
+        """
+        Drop the cached principal of a user.
+
+        :param user_id: The ID of the user.
+        :return: None.
+        """
+        user_id = str(user_id)
+        self.local_generation += 1
+        self.local.pop(user_id, None)
+        try:
+            redis = await cache_database()
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.incr(self._generation_key(user_id))
+                pipe.expire(self._generation_key(user_id), self.ttl)
+                pipe.delete(self._key(user_id))
+                await pipe.execute()
+        except RedisError as e:
+            print(f"Failed to invalidate the cached user {user_id}: {e}")
+
+    async def clear(self) -> None:
+        """
+        Drop every cached principal.
+
+        :return: None.
+        """
+        self.local_generation += 1
+        self.local.clear()
+        try:
+            redis = await cache_database()
+            await redis.incr(self.VERSION_KEY)
+        except RedisError as e:
+            print(f"Failed to clear the user cache: {e}")
+
+
+user_cache = UserCache()
@@ -6,7 +6,18 @@ from fastapi_users_db_sqlalchemy import (
     SQLAlchemyBaseUserTableUUID,
     SQLAlchemyBaseOAuthAccountTableUUID,
 )
-from sqlalchemy import String, Integer, DateTime, Boolean, func, Uuid, Numeric
+from sqlalchemy import (
+    String,
+    Integer,
+    DateTime,
+    Boolean,
+    func,
+    Uuid,
+    Numeric,
+    Index,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR, JSONB, ARRAY
 
 from sqlalchemy.orm import DeclarativeBase, relationship, Mapped, mapped_column
 from sqlalchemy.sql.schema import ForeignKey
@@ -44,16 +55,16 @@ class User(Base):
         "Permission", back_populates="users", lazy="joined"
     )
     images: Mapped[list["Image"]] = relationship(
-        "Image", back_populates="owner", lazy="joined", cascade="all, delete"
+        "Image", back_populates="owner", lazy="select", cascade="all, delete"
     )
     comments: Mapped[list["Comment"]] = relationship(
         "Comment", back_populates="owner", lazy="noload", cascade="all, delete"
     )
     ratings: Mapped[list["Rating"]] = relationship(
-        "Rating", back_populates="owner", lazy="joined", cascade="all, delete"
+        "Rating", back_populates="owner", lazy="select", cascade="all, delete"
     )
     likes: Mapped[list["Like"]] = relationship(
-        "Like", back_populates="owner", lazy="joined", cascade="all, delete"
+        "Like", back_populates="owner", lazy="select", cascade="all, delete"
     )
 
 
@@ -91,7 +102,9 @@ class Comment(Base):
     __tablename__ = "comments"
     id: Mapped[int] = mapped_column(primary_key=True)
     owner_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("user.id"))
-    image_id: Mapped[int] = mapped_column(Integer, ForeignKey("images.id", ondelete="CASCADE"))
+    image_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("images.id", ondelete="CASCADE")
+    )
     text: Mapped[str] = mapped_column(String(200))
 
     created_at: Mapped[datetime] = mapped_column(
@@ -104,6 +117,10 @@ class Comment(Base):
     owner: Mapped[User] = relationship("User", back_populates="comments")
     image: Mapped["Image"] = relationship("Image", back_populates="comments")
 
+    __table_args__ = (
+        Index("ix_comments_image_id_created_at_id", "image_id", "created_at", "id"),
+    )
+
 
 class Image(Base):
     __tablename__ = "images"
@@ -115,7 +132,30 @@ class Image(Base):
         String(300), nullable=False, default="placeholder"
     )
     rating: Mapped[Numeric(3, 2)] = mapped_column(Numeric(3, 2), default=0.00)
+    rating_sum: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    rating_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    rating_histogram: Mapped[list[int]] = mapped_column(
+        ARRAY(Integer),
+        nullable=False,
+        default=lambda: [0, 0, 0, 0, 0],
+        server_default="{0,0,0,0,0}",
+    )
+    likes_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    comments_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    search_vector: Mapped[str] = mapped_column(TSVECTOR, nullable=True, deferred=True)
+    asset_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("stored_assets.id"), nullable=True, index=True
+    )
     edited_cloudinary_url: Mapped[str] = mapped_column(String(300), nullable=True)
+    variants: Mapped[dict] = mapped_column(JSONB, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, default=None, onupdate=func.now(), nullable=True
@@ -125,17 +165,52 @@ class Image(Base):
         "Tag",
         secondary="image_tags",
         back_populates="images",
-        lazy="joined",
-        cascade="all, delete",
+        lazy="select",
+        passive_deletes=True,
     )
     comments: Mapped[list[Comment]] = relationship(
-        "Comment", back_populates="image", lazy="joined", cascade="all, delete"
+        "Comment",
+        back_populates="image",
+        lazy="select",
+        cascade="all, delete",
+        passive_deletes=True,
     )
     likes: Mapped[list["Like"]] = relationship(
-        "Like", back_populates="image", lazy="joined", cascade="all, delete"
+        "Like",
+        back_populates="image",
+        lazy="select",
+        cascade="all, delete",
+        passive_deletes=True,
+    )
+
+    __table_args__ = (
+        Index("ix_images_created_at_id", "created_at", "id"),
+        Index("ix_images_owner_id_created_at_id", "owner_id", "created_at", "id"),
+        Index("ix_images_search_vector", "search_vector", postgresql_using="gin"),
     )
 
 
+class StoredAsset(Base):
+    __tablename__ = "stored_assets"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False, unique=True)
+    public_id: Mapped[str] = mapped_column(String(300), nullable=False)
+    cloudinary_url: Mapped[str] = mapped_column(String(300), nullable=False)
+    ref_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=1, server_default="1"
+    )
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+
+
+class ImageTransformation(Base):
+    __tablename__ = "image_transformations"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    spec_hash: Mapped[str] = mapped_column(String(64), nullable=False, unique=True)
+    source_public_id: Mapped[str] = mapped_column(String(300), nullable=False)
+    edited_url: Mapped[str] = mapped_column(String(300), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+
+
 class Tag(Base):
     __tablename__ = "tags"
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -145,12 +220,43 @@ class Tag(Base):
     )
 
 
+class TagStats(Base):
+    __tablename__ = "tag_stats"
+    tag_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True
+    )
+    image_count: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+
+
+class TagCooccurrence(Base):
+    __tablename__ = "tag_cooccurrences"
+    tag_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True
+    )
+    related_tag_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True
+    )
+    count: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_tag_cooccurrences_tag_id_count", "tag_id", "count"),
+    )
+
+
 class ImageTag(Base):
     __tablename__ = "image_tags"
     id: Mapped[int] = mapped_column(primary_key=True)
-    image_id: Mapped[int] = mapped_column(Integer, ForeignKey("images.id", ondelete="CASCADE"))
+    image_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("images.id", ondelete="CASCADE")
+    )
     tag_id: Mapped[int] = mapped_column(Integer, ForeignKey("tags.id"))
 
+    __table_args__ = (
+        UniqueConstraint("image_id", "tag_id", name="uq_image_tags_image_id_tag_id"),
+        Index("ix_image_tags_tag_id_image_id", "tag_id", "image_id"),
+    )
+
 
 class Rating(Base):
     __tablename__ = "ratings"
@@ -160,12 +266,18 @@ class Rating(Base):
     value: Mapped[int] = mapped_column(Integer, nullable=False)
     owner: Mapped[User] = relationship("User", back_populates="ratings")
 
+    __table_args__ = (
+        Index("uq_ratings_owner_id_image_id", "owner_id", "image_id", unique=True),
+    )
+
 
 class Like(Base):
     __tablename__ = "likes"
     id: Mapped[int] = mapped_column(primary_key=True)
     owner_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("user.id"))
-    image_id: Mapped[int] = mapped_column(Integer, ForeignKey("images.id", ondelete="CASCADE"))
+    image_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("images.id", ondelete="CASCADE"), index=True
+    )
     owner: Mapped[User] = relationship("User", back_populates="likes")
     image: Mapped[Image] = relationship("Image", back_populates="likes")
     created_at: Mapped[datetime] = mapped_column(
@@ -0,0 +1,144 @@
+"""
+Keyset Pagination
+
+This module contains helpers for cursor (keyset) pagination.
+
+A cursor is an opaque url-safe token that encodes the sort key of the row a
+page ended on. The next page is then fetched with a ``WHERE (a, b) > (x, y)``
+condition that an index on ``(a, b)`` answers directly, so the cost of a page
+does not depend on how deep into the result set it is.
+
+Functions:
+- encode_cursor: Encode sort key values into an opaque cursor.
+- decode_cursor: Decode a cursor back into typed sort key values.
+- keyset_where: Build the row-value condition that continues after a cursor.
+- keyset_order: Build the ORDER BY clause for a page.
+- keyset_page: Trim a fetched page and build its next/previous cursors.
+- set_cursor_headers: Expose page cursors to the client in response headers.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, Sequence
+
+from fastapi import Response
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+PREV_CURSOR_HEADER = "X-Prev-Cursor"
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Encode sort key values into an opaque cursor.
+
+    :param values: Any: The sort key values of the row the page ended on.
+    :return: A url-safe cursor string.
+    """
+    payload = [
+        value.isoformat() if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> tuple:
+    """
+    Decode a cursor back into sort key values.
+
+    :param cursor: str: The cursor received from the client.
+    :param types: type: The expected type of every value in the cursor.
+    :return: A tuple with the decoded values.
+    :raises ValueError: If the cursor is malformed.
+    """
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise ValueError("Invalid cursor")
+        return tuple(
+            datetime.fromisoformat(value) if type_ is datetime else type_(value)
+            for value, type_ in zip(payload, types)
+        )
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def keyset_where(columns: Sequence, values: Sequence, descending: bool, backwards: bool):
+    """
+    Build the condition that selects the rows following a cursor.
+
+    :param columns: Sequence: The sort key columns.
+    :param values: Sequence: The decoded cursor values.
+    :param descending: bool: Whether the listing is sorted in descending order.
+    :param backwards: bool: Whether the previous page is requested.
+    :return: A row-value comparison expression.
+    """
+    if descending != backwards:
+        return tuple_(*columns) < tuple_(*values)
+    return tuple_(*columns) > tuple_(*values)
+
+
+def keyset_order(columns: Sequence, descending: bool, backwards: bool) -> list:
+    """
+    Build the ORDER BY clause for a page.
+
+    Previous pages are fetched in reverse order and flipped back by keyset_page.
+
+    :param columns: Sequence: The sort key columns.
+    :param descending: bool: Whether the listing is sorted in descending order.
+    :param backwards: bool: Whether the previous page is requested.
+    :return: A list of ordering expressions.
+    """
+    if descending != backwards:
+        return [column.desc() for column in columns]
+    return [column.asc() for column in columns]
+
+
+def keyset_page(
+        rows: Sequence,
+        limit: int,
+        cursor: str | None,
+        backwards: bool,
+        key: Callable[[Any], tuple],
+) -> tuple[list, str | None, str | None]:
+    """
+    Trim a page fetched with ``limit + 1`` rows and build its cursors.
+
+    :param rows: Sequence: The fetched rows, at most limit + 1 of them.
+    :param limit: int: The page size.
+    :param cursor: str | None: The cursor the page was requested with.
+    :param backwards: bool: Whether the previous page was requested.
+    :param key: Callable: Returns the sort key values of a row.
+    :return: The page rows, the next cursor and the previous cursor.
+    """
+    has_more = len(rows) > limit
+    page = list(rows[:limit])
+    if backwards:
+        page.reverse()
+    if not page:
+        return page, None, None
+    has_next = has_more if not backwards else cursor is not None
+    has_prev = has_more if backwards else cursor is not None
+    next_cursor = encode_cursor(*key(page[-1])) if has_next else None
+    prev_cursor = encode_cursor(*key(page[0])) if has_prev else None
+    return page, next_cursor, prev_cursor
+
+
+def set_cursor_headers(
+        response: Response, next_cursor: str | None, prev_cursor: str | None
+) -> None:
+    """
+    Expose page cursors to the client in response headers.
+
+    :param response: Response: The outgoing response.
+    :param next_cursor: str | None: The cursor of the next page.
+    :param prev_cursor: str | None: The cursor of the previous page.
+    :return: None.
+    """
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if prev_cursor:
+        response.headers[PREV_CURSOR_HEADER] = prev_cursor
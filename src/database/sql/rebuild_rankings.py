@@ -0,0 +1,50 @@
+"""
+Ranking Rebuild
+
+This module rebuilds the top-rated and trending rankings in Redis from the
+images table, e.g. after the first deploy or when Redis lost its data.
+
+Run it with ``python -m src.database.sql.rebuild_rankings``.
+
+Functions:
+- rebuild_rankings: Recompute the ranking scores of every image.
+"""
+import asyncio
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.cache.rankings import rankings
+from src.database.sql.models import Image
+from src.database.sql.postgres import database
+from src.image.repository import RANKING_COLUMNS
+
+
+async def rebuild_rankings(session: AsyncSession) -> int:
+    """
+    Recompute the ranking scores of every image.
+
+    Images are streamed from the database, so memory use does not grow with the
+    number of images.
+
+    :param session: AsyncSession: The database session.
+    :return: The number of ranked images.
+    """
+    stmt = select(Image.id, *RANKING_COLUMNS).execution_options(yield_per=1000)
+    rows = await session.stream(stmt)
+
+    async def images():
+        async for row in rows:
+            yield row.id, row
+
+    return await rankings.rebuild(images())
+
+
+async def main():
+    async with database.async_session() as session:
+        total = await rebuild_rankings(session)
+    print(f"Ranked {total} images")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,51 @@
+"""
+Tag Index Rebuild
+
+This module rebuilds the Redis tag autocomplete index from the image_tags
+table, e.g. after the first deploy or when Redis lost its data.
+
+Run it with ``python -m src.database.sql.rebuild_tag_index``.
+
+Functions:
+- rebuild_tag_index: Recompute the usage count of every tag in use.
+"""
+import asyncio
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.cache.tag_index import tag_index
+from src.database.sql.models import Tag, ImageTag
+from src.database.sql.postgres import database
+
+
+async def rebuild_tag_index(session: AsyncSession) -> int:
+    """
+    Recompute the usage count of every tag that is attached to an image.
+
+    :param session: AsyncSession: The database session.
+    :return: The number of indexed tags.
+    """
+    stmt = (
+        select(Tag.name, func.count(ImageTag.id).label("usage"))
+        .join(ImageTag, ImageTag.tag_id == Tag.id)
+        .group_by(Tag.id)
+        .execution_options(yield_per=1000)
+    )
+    rows = await session.stream(stmt)
+
+    async def tags():
+        async for row in rows:
+            yield row.name, row.usage
+
+    return await tag_index.rebuild(tags())
+
+
+async def main():
+    async with database.async_session() as session:
+        total = await rebuild_tag_index(session)
+    print(f"Indexed {total} tags")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
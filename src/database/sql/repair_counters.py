@@ -0,0 +1,111 @@
+"""
+Counter Repair
+
+This module recomputes the denormalized counters on the images table from the
+rows they summarize and fixes any image whose counters drifted.
+
+Run it with ``python -m src.database.sql.repair_counters``.
+
+Functions:
+- repair_counters: Recompute likes_count and comments_count where they drifted.
+- repair_ratings: Recompute rating_sum, rating_count, rating_histogram and rating
+  where they drifted.
+"""
+import asyncio
+
+from sqlalchemy import func, select, update, cast, Numeric
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.sql.models import Image, Like, Comment, Rating
+from src.database.sql.postgres import database
+
+
+async def repair_counters(session: AsyncSession) -> list[int]:
+    """
+    Recompute likes_count and comments_count for images where they drifted.
+
+    :param session: AsyncSession: The database session.
+    :return: The IDs of the repaired images.
+    """
+    likes = select(func.count(Like.id)).where(Like.image_id == Image.id).scalar_subquery()
+    comments = (
+        select(func.count(Comment.id)).where(Comment.image_id == Image.id).scalar_subquery()
+    )
+    stmt = (
+        update(Image)
+        .where((Image.likes_count != likes) | (Image.comments_count != comments))
+        .values(likes_count=likes, comments_count=comments)
+        .returning(Image.id)
+        .execution_options(synchronize_session=False)
+    )
+    repaired = await session.execute(stmt)
+    image_ids = list(repaired.scalars().all())
+    await session.commit()
+    return image_ids
+
+
+async def repair_ratings(session: AsyncSession) -> list[int]:
+    """
+    Recompute rating_sum, rating_count, the rating histogram and the average rating
+    for images where they drifted.
+
+    :param session: AsyncSession: The database session.
+    :return: The IDs of the repaired images.
+    """
+    rating_sum = (
+        select(func.coalesce(func.sum(Rating.value), 0))
+        .where(Rating.image_id == Image.id)
+        .scalar_subquery()
+    )
+    rating_count = (
+        select(func.count(Rating.id)).where(Rating.image_id == Image.id).scalar_subquery()
+    )
+    histogram = array(
+        [
+            select(func.count(Rating.id))
+            .where((Rating.image_id == Image.id) & (Rating.value == value))
+            .scalar_subquery()
+            for value in range(1, 6)
+        ]
+    )
+    average = func.coalesce(
+        func.round(cast(Image.rating_sum, Numeric) / func.nullif(Image.rating_count, 0), 2),
+        0,
+    )
+    stmt = (
+        update(Image)
+        .where(
+            (Image.rating_sum != rating_sum)
+            | (Image.rating_count != rating_count)
+            | (Image.rating_histogram != histogram)
+        )
+        .values(
+            rating_sum=rating_sum, rating_count=rating_count, rating_histogram=histogram
+        )
+        .returning(Image.id)
+        .execution_options(synchronize_session=False)
+    )
+    repaired = await session.execute(stmt)
+    image_ids = list(repaired.scalars().all())
+    if image_ids:
+        await session.execute(
+            update(Image)
+            .where(Image.id.in_(image_ids))
+            .values(rating=average)
+            .execution_options(synchronize_session=False)
+        )
+    await session.commit()
+    return image_ids
+
+
+async def main():
+    async with database.async_session() as session:
+        image_ids = await repair_counters(session)
+        rated_image_ids = await repair_ratings(session)
+    print(f"Repaired counters of {len(image_ids)} images: {image_ids}")
+    print(f"Repaired ratings of {len(rated_image_ids)} images: {rated_image_ids}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -4,30 +4,204 @@ Image Repository
 This module contains database query functions related to images.
 
 Functions:
+- feed_statement: Build the single-statement feed projection.
+- feed_item: Build a feed item from a row of the feed projection.
+- search_document: Build the full-text document of an image from its title, tags and comments.
+- search_append: Build the expression that appends text to an image's search vector.
 - create: Create a new image in the database.
+- create_many: Create many images in one statement.
+- get_feed: Retrieve a feed page using LIMIT/OFFSET.
+- get_feed_page: Retrieve a feed page using keyset pagination.
+- get_owner_page: Retrieve a page of a user's images using keyset pagination.
+- get_item: Retrieve one image in the feed projection.
+- search: Full-text search over image titles, tag names and comment text.
+- get_ranking: Retrieve a page of the top-rated or trending images.
+- refresh_search_vector: Rebuild the search vector of an image.
+- acquire: Take a reference to a stored asset by content hash.
+- register: Record a newly uploaded asset.
+- exists_many: Find which content hashes already have a stored asset.
+- acquire_many: Take references to many stored assets by content hash.
+- register_many: Record many assets and their new references in one statement.
+- release: Drop a reference to a stored asset.
+- TransformationQuery.read: Look up a stored transformation result.
+- TransformationQuery.create: Record a transformation result.
 - read: Retrieve an image object from the database by its ID.
+- exists: Check whether an image exists.
 - update: Update an image in the database.
 - delete: Delete an image from the database.
 """
 
-from sqlalchemy import select
+from datetime import datetime
+
+from sqlalchemy import Row, Select, String, bindparam, case, delete, func, literal_column, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, raiseload
 
-from src.database.sql.models import Image, User, Like
+from src.database.cache.events import event_broker
+from src.database.cache.feed_cache import feed_cache
+from src.database.cache.rankings import rankings
+from src.database.cache.tag_index import tag_index
+from src.database.cache.dirty_tags import dirty_tags
+from src.database.sql.models import (
+    Image,
+    User,
+    Like,
+    Tag,
+    ImageTag,
+    Comment,
+    StoredAsset,
+    ImageTransformation,
+)
+from src.database.sql.pagination import (
+    decode_cursor,
+    keyset_order,
+    keyset_page,
+    keyset_where,
+)
 from src.image.schemas import ImageSchemaUpdateRequest, ImageSchemaResponse, OwnerInfo
+from src.image.utils.storage_client import storage_client, StorageError
+
+
+SEARCH_CONFIG = literal_column("'simple'::regconfig")
+
+# The image columns the ranking scores are computed from.
+RANKING_COLUMNS = (
+    Image.rating_sum,
+    Image.rating_count,
+    Image.likes_count,
+    Image.comments_count,
+    Image.created_at,
+)
+
+
+def feed_statement() -> Select:
+    """
+    Build the feed projection: image columns, owner info, tag names and like/comment
+    counts in a single statement.
+
+    Only plain columns are selected, so none of the joined relationships on Image or
+    User are loaded. Like and comment counts are read from the denormalized counters
+    on images; tag names come from a correlated subquery answered by the image_id
+    index on image_tags.
+
+    :return: A select statement, to be filtered, ordered and limited by the caller.
+    """
+    tags = func.array(
+        select(Tag.name)
+        .join(ImageTag, ImageTag.tag_id == Tag.id)
+        .where(ImageTag.image_id == Image.id)
+        .correlate(Image)
+        .scalar_subquery(),
+        type_=ARRAY(String),
+    )
+    return (
+        select(
+            Image.id,
+            Image.title,
+            Image.cloudinary_url,
+            Image.edited_cloudinary_url,
+            Image.variants,
+            Image.created_at,
+            Image.updated_at,
+            Image.rating,
+            User.id.label("owner_id"),
+            User.email.label("owner_email"),
+            User.username.label("owner_username"),
+            User.avatar.label("owner_avatar"),
+            Image.likes_count.label("likes"),
+            Image.comments_count.label("comments"),
+            tags.label("tags"),
+        )
+        .join(User, User.id == Image.owner_id)
+    )
+
+
+def feed_item(row: Row) -> ImageSchemaResponse:
+    """
+    Build a feed item from a row of the feed projection.
+
+    :param row: Row: A row returned by a feed_statement query.
+    :return: The feed item.
+    """
+    return ImageSchemaResponse(
+        owner=OwnerInfo(
+            id=row.owner_id,
+            email=row.owner_email,
+            username=row.owner_username,
+            avatar=row.owner_avatar,
+        ),
+        id=row.id,
+        title=row.title,
+        cloudinary_url=row.cloudinary_url,
+        edited_cloudinary_url=row.edited_cloudinary_url,
+        variants=row.variants,
+        created_at=row.created_at,
+        updated_at=row.updated_at,
+        rating=row.rating,
+        likes=row.likes,
+        tags=list(row.tags),
+        comments=row.comments,
+    )
+
+
+def _weighted_vector(text, weight: str):
+    return func.setweight(
+        func.to_tsvector(SEARCH_CONFIG, func.coalesce(text, "")),
+        literal_column(f"'{weight}'"),
+    )
+
+
+def search_document():
+    """
+    Build the full-text document of an image: its title (weight A), tag names (B)
+    and comment text (C).
+
+    :return: A tsvector expression correlated to the images table.
+    """
+    tags = (
+        select(func.string_agg(Tag.name, " "))
+        .join(ImageTag, ImageTag.tag_id == Tag.id)
+        .where(ImageTag.image_id == Image.id)
+        .scalar_subquery()
+    )
+    comments = (
+        select(func.string_agg(Comment.text, " "))
+        .where(Comment.image_id == Image.id)
+        .scalar_subquery()
+    )
+    return (
+        _weighted_vector(Image.title, "A")
+        .op("||")(_weighted_vector(tags, "B"))
+        .op("||")(_weighted_vector(comments, "C"))
+    )
+
+
+def search_append(text: str, weight: str):
+    """
+    Build the expression that appends text to the search vector of an image.
 
+    Used on the write paths that only add text, so they do not have to re-read every
+    tag and comment of the image.
 
-async def get_owner_data(image: Image, session: AsyncSession):
-    owner_id = image.owner_id
-    owner = await session.execute(select(User).where(User.id == owner_id))
-    owner = owner.scalar()
-    return owner
+    :param text: str: The text to append.
+    :param weight: str: The tsvector weight of the text (A, B or C).
+    :return: A tsvector expression for the images.search_vector column.
+    """
+    return func.coalesce(Image.search_vector, literal_column("''::tsvector")).op("||")(
+        _weighted_vector(text, weight)
+    )
 
 
 class ImageQuery:
     @staticmethod
     async def create(
-            title: str, cloudinary_url: str, user: User, session: AsyncSession
+            title: str,
+            cloudinary_url: str,
+            user: User,
+            session: AsyncSession,
+            asset_id: int | None = None,
+            variants: dict[str, str] | None = None,
     ) -> Image:
         """
         Create a new image in the database.
@@ -36,56 +210,263 @@ class ImageQuery:
         :param cloudinary_url: str: The URL of the image in Cloudinary.
         :param user: User: The user who owns the image.
         :param session: AsyncSession: The database session.
+        :param asset_id: int | None: The stored asset the image points at.
+        :param variants: dict[str, str] | None: The URLs of the responsive variants.
         :return: The created image object.
         """
-        image = Image(title=title, owner_id=user.id, cloudinary_url=cloudinary_url)
+        image = Image(
+            title=title,
+            owner_id=user.id,
+            cloudinary_url=cloudinary_url,
+            asset_id=asset_id,
+            variants=variants,
+            search_vector=_weighted_vector(title, "A"),
+        )
         session.add(image)
         await session.commit()
+        await feed_cache.invalidate()
+        await rankings.update(image.id, image)
         return image
 
+    @staticmethod
+    async def create_many(
+            images: list[dict], user: User, session: AsyncSession
+    ) -> list[Image]:
+        """
+        Create many images in one INSERT statement.
+
+        :param images: list[dict]: The title, cloudinary_url, asset_id and variants of
+            every image.
+        :param user: User: The user who owns the images.
+        :param session: AsyncSession: The database session.
+        :return: The created image objects, in the order of the input.
+        """
+        # Executed as executemany, so RETURNING can be sorted to match the input rows;
+        # a multi-row VALUES has no such guarantee.
+        stmt = (
+            insert(Image)
+            .values(search_vector=_weighted_vector(bindparam("search_title"), "A"))
+            .returning(Image, sort_by_parameter_order=True)
+        )
+        created = await session.scalars(
+            stmt,
+            [
+                {**image, "owner_id": user.id, "search_title": image["title"]}
+                for image in images
+            ],
+        )
+        created = list(created.all())
+        await session.commit()
+        await feed_cache.invalidate()
+        await rankings.update_many((image.id, image) for image in created)
+        return created
+
     @staticmethod
     async def get_feed(
             limit: int,
             offset: int,
             session: AsyncSession
     ):
-        stmt = select(Image).limit(limit).offset(offset).order_by(Image.created_at)
+        stmt = feed_statement().limit(limit).offset(offset).order_by(Image.created_at)
         feed = await session.execute(stmt)
-        result = feed.scalars().unique().all()
-
-        img_feed_list = []
-        for image in result:
-            print(image)
-            owner = await get_owner_data(image, session)  # Отримуємо об'єкт користувача
-            img_feed = ImageSchemaResponse(
-                owner=OwnerInfo(**owner.__dict__),
-                id=image.id,
-                title=image.title,
-                cloudinary_url=image.cloudinary_url,
-                edited_cloudinary_url=image.edited_cloudinary_url,
-                created_at=image.created_at,
-                updated_at=image.updated_at,
-                rating=image.rating,
-                likes=len(image.likes),
-                tags=[tag.name for tag in image.tags],
-                comments=len(image.comments),
-                )
-            img_feed_list.append(img_feed)
-        return img_feed_list
+        return [feed_item(row) for row in feed.all()]
+
+    @staticmethod
+    async def get_feed_page(
+            limit: int,
+            cursor: str | None,
+            backwards: bool,
+            session: AsyncSession
+    ) -> tuple[list[ImageSchemaResponse], str | None, str | None]:
+        """
+        Retrieve a feed page using keyset pagination over (created_at, id).
+
+        :param limit: int: The page size.
+        :param cursor: str | None: The cursor returned with a previous page.
+        :param backwards: bool: Whether to fetch the page before the cursor.
+        :param session: AsyncSession: The database session.
+        :return: The feed items, the next cursor and the previous cursor.
+        :raises ValueError: If the cursor is malformed.
+        """
+        columns = (Image.created_at, Image.id)
+        stmt = feed_statement().order_by(*keyset_order(columns, False, backwards))
+        if cursor:
+            values = decode_cursor(cursor, datetime, int)
+            stmt = stmt.where(keyset_where(columns, values, False, backwards))
+        feed = await session.execute(stmt.limit(limit + 1))
+        rows, next_cursor, prev_cursor = keyset_page(
+            feed.all(), limit, cursor, backwards, lambda row: (row.created_at, row.id)
+        )
+        return [feed_item(row) for row in rows], next_cursor, prev_cursor
+
+    @staticmethod
+    async def get_owner_page(
+            owner_id,
+            limit: int,
+            cursor: str | None,
+            backwards: bool,
+            session: AsyncSession
+    ) -> tuple[list[ImageSchemaResponse], str | None, str | None]:
+        """
+        Retrieve a page of a user's images, newest first, using keyset pagination
+        over (created_at, id).
+
+        :param owner_id: The ID of the user.
+        :param limit: int: The page size.
+        :param cursor: str | None: The cursor returned with a previous page.
+        :param backwards: bool: Whether to fetch the page before the cursor.
+        :param session: AsyncSession: The database session.
+        :return: The images, the next cursor and the previous cursor.
+        :raises ValueError: If the cursor is malformed.
+        """
+        columns = (Image.created_at, Image.id)
+        stmt = (
+            feed_statement()
+            .where(Image.owner_id == owner_id)
+            .order_by(*keyset_order(columns, True, backwards))
+        )
+        if cursor:
+            values = decode_cursor(cursor, datetime, int)
+            stmt = stmt.where(keyset_where(columns, values, True, backwards))
+        images = await session.execute(stmt.limit(limit + 1))
+        rows, next_cursor, prev_cursor = keyset_page(
+            images.all(), limit, cursor, backwards, lambda row: (row.created_at, row.id)
+        )
+        return [feed_item(row) for row in rows], next_cursor, prev_cursor
+
+    @staticmethod
+    async def get_item(image_id: int, session: AsyncSession) -> ImageSchemaResponse | None:
+        """
+        Retrieve one image in the feed projection, with its tag names and its like
+        and comment counts. The comments themselves are paged by /comment/image/{id}.
+
+        :param image_id: int: The ID of the image.
+        :param session: AsyncSession: The database session.
+        :return: The image or None if it doesn't exist.
+        """
+        row = await session.execute(feed_statement().where(Image.id == image_id))
+        row = row.one_or_none()
+        return feed_item(row) if row is not None else None
+
+    @staticmethod
+    async def search(
+            text: str,
+            limit: int,
+            cursor: str | None,
+            backwards: bool,
+            session: AsyncSession,
+    ) -> tuple[list[ImageSchemaResponse], str | None, str | None]:
+        """
+        Full-text search over image titles, tag names and comment text.
+
+        The GIN index on images.search_vector answers the match. Results are ranked
+        by ts_rank and paginated by keyset over (rank, id), so pages stay stable
+        while new images are added. The rank is computed per query, so every page
+        still ranks and sorts the whole match set: a page costs about as much as a
+        broad search, however deep it is.
+
+        :param text: str: The search string, in websearch syntax.
+        :param limit: int: The page size.
+        :param cursor: str | None: The cursor returned with a previous page.
+        :param backwards: bool: Whether to fetch the page before the cursor.
+        :param session: AsyncSession: The database session.
+        :return: The matching feed items, the next cursor and the previous cursor.
+        :raises ValueError: If the cursor is malformed.
+        """
+        query = func.websearch_to_tsquery(SEARCH_CONFIG, text)
+        rank = func.ts_rank(Image.search_vector, query)
+        columns = (rank, Image.id)
+        stmt = (
+            feed_statement()
+            .add_columns(rank.label("rank"))
+            .where(Image.search_vector.bool_op("@@")(query))
+            .order_by(*keyset_order(columns, True, backwards))
+        )
+        if cursor:
+            values = decode_cursor(cursor, float, int)
+            stmt = stmt.where(keyset_where(columns, values, True, backwards))
+        found = await session.execute(stmt.limit(limit + 1))
+        rows, next_cursor, prev_cursor = keyset_page(
+            found.all(), limit, cursor, backwards, lambda row: (row.rank, row.id)
+        )
+        return [feed_item(row) for row in rows], next_cursor, prev_cursor
+
+    @staticmethod
+    async def get_ranking(
+            ranking: str, limit: int, cursor: str | None, session: AsyncSession
+    ) -> tuple[list[ImageSchemaResponse], str | None]:
+        """
+        Retrieve a page of the top-rated or trending images.
+
+        The order comes from the Redis ranking; Postgres is only asked for the feed
+        projection of the images on the page, by primary key.
+
+        :param ranking: str: Rankings.TOP or Rankings.TRENDING.
+        :param limit: int: The page size.
+        :param cursor: str | None: The cursor returned with a previous page.
+        :param session: AsyncSession: The database session.
+        :return: The feed items and the next cursor.
+        :raises ValueError: If the cursor is malformed.
+        """
+        image_ids, next_cursor = await rankings.page(ranking, limit, cursor)
+        if not image_ids:
+            return [], next_cursor
+        found = await session.execute(feed_statement().where(Image.id.in_(image_ids)))
+        rows = {row.id: row for row in found.all()}
+        items = [feed_item(rows[image_id]) for image_id in image_ids if image_id in rows]
+        return items, next_cursor
+
+    @staticmethod
+    async def refresh_search_vector(image_id: int, session: AsyncSession) -> None:
+        """
+        Rebuild the search vector of an image from its title, tags and comments.
+
+        Does not commit; the caller commits together with the change that made the
+        vector stale.
+
+        :param image_id: int: The ID of the image.
+        :param session: AsyncSession: The database session.
+        :return: None.
+        """
+        await session.execute(
+            update(Image)
+            .where(Image.id == image_id)
+            .values(search_vector=search_document())
+            .execution_options(synchronize_session=False)
+        )
 
     @staticmethod
     async def read(image_id: int, session: AsyncSession) -> Image | None:
         """
         Retrieve an image object from the database by its ID.
 
+        Only the owner is loaded along with the image; any other relationship raises
+        on access instead of loading silently.
+
         :param image_id: int: The ID of the image to retrieve.
         :param session: AsyncSession: A database connection session.
         :return: An image object or None if it doesn't exist.
         """
-        stmt = select(Image).where(Image.id == image_id)
+        stmt = (
+            select(Image)
+            .where(Image.id == image_id)
+            .options(joinedload(Image.owner), raiseload("*"))
+        )
         image = await session.execute(stmt)
         return image.scalars().unique().one_or_none()
 
+    @staticmethod
+    async def exists(image_id: int, session: AsyncSession) -> bool:
+        """
+        Check whether an image exists, without loading it.
+
+        :param image_id: int: The ID of the image.
+        :param session: AsyncSession: A database connection session.
+        :return: True if the image exists.
+        """
+        found = await session.scalar(select(Image.id).where(Image.id == image_id))
+        return found is not None
+
     @staticmethod
     async def update(
             image: Image,
@@ -104,10 +485,13 @@ class ImageQuery:
         """
         if image_data:
             image.title = image_data.title
+            await session.flush()
+            await ImageQuery.refresh_search_vector(image.id, session)
         if edited_cloudinary_url:
             image.edited_cloudinary_url = edited_cloudinary_url
         await session.commit()
         await session.refresh(image)
+        await feed_cache.invalidate()
         return image
 
     @staticmethod
@@ -115,19 +499,249 @@ class ImageQuery:
         """
         Delete an image from the database.
 
+        The stored asset of the image is removed from storage only when this was its
+        last reference.
+
         :param image: Image: The image object to delete.
         :param session: AsyncSession: The database session.
         :return: None.
         """
+        asset_id, image_id = image.asset_id, image.id
+        tags = await session.scalars(
+            select(Tag.name)
+            .join(ImageTag, ImageTag.tag_id == Tag.id)
+            .where(ImageTag.image_id == image_id)
+        )
+        tag_names = list(tags.all())
         await session.delete(image)
+        orphan_public_id = None
+        if asset_id is not None:
+            await session.flush()
+            orphan_public_id = await AssetQuery.release(asset_id, session)
         await session.commit()
+        await feed_cache.invalidate()
+        await rankings.remove(image_id)
+        await tag_index.remove(tag_names)
+        await dirty_tags.mark(tag_names)
+        if orphan_public_id:
+            try:
+                await storage_client.destroy(orphan_public_id)
+            except StorageError as e:
+                print(f"Failed to remove asset {orphan_public_id} from storage: {e}")
 
     @staticmethod
     async def create_like(image_id: int, user: User, session: AsyncSession) -> None:
-        image = await ImageQuery.read(image_id, session)
-        if not image:
+        if not await ImageQuery.exists(image_id, session):
             return None
         like = Like(image_id=image_id, owner_id=user.id)
         session.add(like)
+        counters = await session.execute(
+            update(Image)
+            .where(Image.id == image_id)
+            .values(likes_count=Image.likes_count + 1)
+            .returning(*RANKING_COLUMNS)
+        )
+        counters = counters.one()
         await session.commit()
+        await feed_cache.invalidate()
+        await rankings.update(image_id, counters)
+        await event_broker.publish(
+            image_id,
+            event_broker.LIKE_CREATED,
+            {"image_id": image_id, "owner_id": user.id, "likes": counters.likes_count},
+        )
+
+
 
+class AssetQuery:
+    @staticmethod
+    async def acquire(content_hash: str, session: AsyncSession) -> StoredAsset | None:
+        """
+        Take a reference to the stored asset with the given content hash.
+
+        Does not commit; the reference is committed together with the image that uses it.
+
+        :param content_hash: str: The SHA-256 hex digest of the image content.
+        :param session: AsyncSession: The database session.
+        :return: The asset or None if no asset has this content yet.
+        """
+        stmt = (
+            update(StoredAsset)
+            .where(StoredAsset.content_hash == content_hash)
+            .values(ref_count=StoredAsset.ref_count + 1)
+            .returning(StoredAsset)
+            .execution_options(synchronize_session=False)
+        )
+        asset = await session.execute(stmt)
+        return asset.scalar_one_or_none()
+
+    @staticmethod
+    async def register(
+            content_hash: str, public_id: str, cloudinary_url: str, session: AsyncSession
+    ) -> StoredAsset:
+        """
+        Record a newly uploaded asset and take a reference to it.
+
+        If a concurrent upload of the same content registered first, a reference to that
+        asset is taken instead and returned; the caller should then remove its own upload.
+
+        :param content_hash: str: The SHA-256 hex digest of the image content.
+        :param public_id: str: The public ID the content was uploaded under.
+        :param cloudinary_url: str: The URL of the uploaded content.
+        :param session: AsyncSession: The database session.
+        :return: The asset that holds the content.
+        """
+        stmt = (
+            insert(StoredAsset)
+            .values(
+                content_hash=content_hash,
+                public_id=public_id,
+                cloudinary_url=cloudinary_url,
+                ref_count=1,
+            )
+            .on_conflict_do_update(
+                index_elements=[StoredAsset.content_hash],
+                set_={"ref_count": StoredAsset.ref_count + 1},
+            )
+            .returning(StoredAsset)
+        )
+        asset = await session.execute(stmt)
+        return asset.scalar_one()
+
+    @staticmethod
+    async def exists_many(content_hashes: list[str], session: AsyncSession) -> set[str]:
+        """
+        Find which content hashes already have a stored asset.
+
+        Takes no locks; the references are taken later with acquire_many.
+
+        :param content_hashes: list[str]: The content hashes to look up.
+        :param session: AsyncSession: The database session.
+        :return: The content hashes that have a stored asset.
+        """
+        stmt = select(StoredAsset.content_hash).where(
+            StoredAsset.content_hash.in_(content_hashes)
+        )
+        found = await session.scalars(stmt)
+        return set(found.all())
+
+    @staticmethod
+    async def acquire_many(
+            references: dict[str, int], session: AsyncSession
+    ) -> dict[str, StoredAsset]:
+        """
+        Take references to many stored assets in one statement.
+
+        Does not commit; the references are committed together with the images that
+        use them.
+
+        :param references: dict[str, int]: The number of new references by content hash.
+        :param session: AsyncSession: The database session.
+        :return: The assets by content hash. Hashes without an asset are left out.
+        """
+        if not references:
+            return {}
+        stmt = (
+            update(StoredAsset)
+            .where(StoredAsset.content_hash.in_(list(references)))
+            .values(
+                ref_count=StoredAsset.ref_count
+                + case(references, value=StoredAsset.content_hash, else_=0)
+            )
+            .returning(StoredAsset)
+            .execution_options(synchronize_session=False)
+        )
+        acquired = await session.scalars(stmt)
+        return {asset.content_hash: asset for asset in acquired.all()}
+
+    @staticmethod
+    async def register_many(assets: list[dict], session: AsyncSession) -> dict[str, StoredAsset]:
+        """
+        Record many assets and their new references in one statement.
+
+        Every entry carries the number of new references in ref_count. Assets that
+        already exist only get their reference count increased.
+
+        :param assets: list[dict]: content_hash, public_id, cloudinary_url and ref_count.
+        :param session: AsyncSession: The database session.
+        :return: The assets by content hash.
+        """
+        if not assets:
+            return {}
+        # A fixed row order makes concurrent batches lock shared assets in the same
+        # order, so they wait for each other instead of deadlocking.
+        assets = sorted(assets, key=lambda asset: asset["content_hash"])
+        stmt = insert(StoredAsset).values(assets)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[StoredAsset.content_hash],
+            set_={"ref_count": StoredAsset.ref_count + stmt.excluded.ref_count},
+        ).returning(StoredAsset)
+        registered = await session.scalars(stmt)
+        return {asset.content_hash: asset for asset in registered.all()}
+
+    @staticmethod
+    async def release(asset_id: int, session: AsyncSession) -> str | None:
+        """
+        Drop a reference to a stored asset and delete the asset record with its last one.
+
+        Does not commit; the caller commits together with the image deletion.
+
+        :param asset_id: int: The ID of the asset.
+        :param session: AsyncSession: The database session.
+        :return: The public ID to remove from storage, or None if the asset is still used.
+        """
+        await session.execute(
+            update(StoredAsset)
+            .where(StoredAsset.id == asset_id)
+            .values(ref_count=StoredAsset.ref_count - 1)
+            .execution_options(synchronize_session=False)
+        )
+        orphan = await session.execute(
+            delete(StoredAsset)
+            .where((StoredAsset.id == asset_id) & (StoredAsset.ref_count <= 0))
+            .returning(StoredAsset.public_id)
+            .execution_options(synchronize_session=False)
+        )
+        return orphan.scalar_one_or_none()
+
+
+class TransformationQuery:
+    @staticmethod
+    async def read(spec_hash: str, session: AsyncSession) -> str | None:
+        """
+        Look up the result of a transformation by its canonical hash.
+
+        :param spec_hash: str: The canonical transformation hash.
+        :param session: AsyncSession: The database session.
+        :return: The edited image URL or None if the transformation was never done.
+        """
+        stmt = select(ImageTransformation.edited_url).where(
+            ImageTransformation.spec_hash == spec_hash
+        )
+        edited_url = await session.execute(stmt)
+        return edited_url.scalar_one_or_none()
+
+    @staticmethod
+    async def create(
+            spec_hash: str, source_public_id: str, edited_url: str, session: AsyncSession
+    ) -> None:
+        """
+        Record the result of a transformation.
+
+        Does not commit; the record is committed together with the image update.
+
+        :param spec_hash: str: The canonical transformation hash.
+        :param source_public_id: str: The public ID of the source image.
+        :param edited_url: str: The edited image URL.
+        :param session: AsyncSession: The database session.
+        :return: None.
+        """
+        await session.execute(
+            insert(ImageTransformation)
+            .values(
+                spec_hash=spec_hash,
+                source_public_id=source_public_id,
+                edited_url=edited_url,
+            )
+            .on_conflict_do_nothing(index_elements=[ImageTransformation.spec_hash])
+        )
@@ -4,15 +4,37 @@ Image API Routes
 This module contains FastAPI routes related to images.
 
 Routes:
+- get_feed: Retrieve the image feed.
+- get_top_images: Retrieve the top-rated images.
+- get_trending_images: Retrieve the trending images.
 - get_image: Retrieve an image by its ID.
+- stream_image_events: Stream comment and like events of an image.
 - create_image: Create a new image.
+- create_images_batch: Create many images in one request.
+- sign_direct_upload: Sign an upload that goes straight to storage.
+- complete_direct_upload: Record an image uploaded straight to storage.
 - search_image: Search for images.
 - update_image: Update an image.
 - delete_image: Delete an image.
 - transform_image: Transform an image.
+- get_job: Get the status of a background job.
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status, UploadFile, File, Form
+import asyncio
+from typing import Literal
+
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    Depends,
+    status,
+    UploadFile,
+    File,
+    Form,
+    Query,
+    Response,
+)
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from redis.asyncio.client import Redis
@@ -21,31 +43,129 @@ from src.auth.service import current_active_user
 from src.comment.schemas import CommentSchemaResponse
 from src.database.sql.postgres import database
 from src.database.cache.redis_conn import cache_database
-from src.database.sql.models import User
+from src.database.cache.events import event_broker
+from src.database.cache.feed_cache import feed_cache
+from src.database.cache.rankings import Rankings
+from src.database.cache.jobs import job_store
+from src.config import settings
+from src.database.sql.models import User, Image
+from src.database.sql.pagination import set_cursor_headers
 from src.image.repository import ImageQuery
 from src.image.schemas import (
     ImageSchemaResponse,
     ImageSchemaUpdateRequest,
     EditFormData,
+    BatchUploadItemResponse,
+    DirectUploadCompleteRequest,
+    DirectUploadSchemaResponse,
     ImageSchemaResponse,
+    JobSchemaResponse,
     OwnerInfo,
 )
 from src.auth.utils.access import access_service
-from src.image.utils.cloudinary_service import UploadImage, ImageEditor
+from src.image.service import image_service
+from src.image.tasks import upload_image_task, transform_image_task
+from src.image.utils.storage_client import StorageError
 from src.auth.repository import id_user_auth
 
 router = APIRouter(prefix="/image", tags=["images"])
 
 
+async def find_image(image_id: int, db: AsyncSession) -> Image:
+    """
+    Retrieve an image by its ID or fail with 404.
+
+    :param image_id: int: The ID of the image.
+    :param db: AsyncSession: The database session.
+    :return: The image object.
+    """
+    image = await ImageQuery.read(image_id, db)
+    if not image:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Image not found!"
+        )
+    return image
+
+
+def created_image_response(image: Image, user: User) -> ImageSchemaResponse:
+    owner = OwnerInfo(
+        id=user.id, email=user.email, username=user.username, avatar=user.avatar
+    )
+    return ImageSchemaResponse(
+        owner=owner,
+        id=image.id,
+        title=image.title,
+        cloudinary_url=image.cloudinary_url,
+        rating=image.rating,
+        edited_cloudinary_url=image.edited_cloudinary_url,
+        variants=image.variants,
+        created_at=image.created_at,
+        updated_at=image.updated_at,
+    )
+
+
+def queued_job_response(job_id: str, kind: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"job_id": job_id, "kind": kind, "status": job_store.QUEUED},
+    )
+
+
 @router.get("/feed", response_model=list[ImageSchemaResponse])
 async def get_feed(
-        limit: int = 36,
-        offset: int = 0,
+        response: Response,
+        limit: int = Query(default=36, ge=1, le=100),
+        offset: int = Query(default=0, ge=0),
+        cursor: str | None = None,
+        direction: Literal["next", "prev"] = "next",
         user: User = Depends(current_active_user),
         db: AsyncSession = Depends(database),
         cache: Redis = Depends(cache_database),
 ):
-    feed = await ImageQuery.get_feed(limit, offset, db)
+    """
+    Retrieve the image feed.
+
+    Without a cursor the feed is paged with limit/offset. Passing the cursor from
+    the X-Next-Cursor or X-Prev-Cursor header of a previous page switches to keyset
+    pagination, which costs the same on every page and is stable under inserts.
+    Pages are served from the Redis feed cache when possible.
+
+    :param response: Response: The outgoing response, used for cursor headers.
+    :param limit: int: The page size.
+    :param offset: int: The number of images to skip when no cursor is given.
+    :param cursor: str | None: The cursor of the page to continue from.
+    :param direction: str: "next" or "prev", relative to the cursor.
+    :param user: User: The current user.
+    :param db: AsyncSession: The database session.
+    :param cache: Redis: The Redis cache.
+    :return: A list of feed items.
+    """
+    if cursor is None and offset:
+        key = ("offset", limit, offset)
+    else:
+        key = ("cursor", limit, cursor or "", direction)
+    page, cache_key = await feed_cache.get(*key)
+    if page is None:
+        if key[0] == "offset":
+            feed = await ImageQuery.get_feed(limit, offset, db)
+            next_cursor = prev_cursor = None
+        else:
+            try:
+                feed, next_cursor, prev_cursor = await ImageQuery.get_feed_page(
+                    limit, cursor, direction == "prev", db
+                )
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor!"
+                )
+        page = {
+            "items": [item.model_dump(mode="json") for item in feed],
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+        }
+        await feed_cache.set(page, cache_key)
+    feed = page["items"]
+    set_cursor_headers(response, page["next_cursor"], page["prev_cursor"])
     if not feed:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Feed is empty!"
@@ -53,7 +173,66 @@ async def get_feed(
     return feed
 
 
-@router.get("/{image_id}")
+async def ranking_page(
+        ranking: str, response: Response, limit: int, cursor: str | None, db: AsyncSession
+) -> list[ImageSchemaResponse]:
+    try:
+        images, next_cursor = await ImageQuery.get_ranking(ranking, limit, cursor, db)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor!"
+        )
+    set_cursor_headers(response, next_cursor, None)
+    return images
+
+
+@router.get("/top", response_model=list[ImageSchemaResponse])
+async def get_top_images(
+        response: Response,
+        limit: int = Query(default=36, ge=1, le=100),
+        cursor: str | None = None,
+        user: User = Depends(current_active_user),
+        db: AsyncSession = Depends(database),
+):
+    """
+    Retrieve the top-rated images, ranked by a Bayesian average rating.
+
+    The cursor for the next page is returned in the X-Next-Cursor header.
+
+    :param response: Response: The outgoing response, used for cursor headers.
+    :param limit: int: The page size.
+    :param cursor: str | None: The cursor of the page to continue from.
+    :param user: User: The current user.
+    :param db: AsyncSession: The database session.
+    :return: A list of feed items, best first.
+    """
+    return await ranking_page(Rankings.TOP, response, limit, cursor, db)
+
+
+@router.get("/trending", response_model=list[ImageSchemaResponse])
+async def get_trending_images(
+        response: Response,
+        limit: int = Query(default=36, ge=1, le=100),
+        cursor: str | None = None,
+        user: User = Depends(current_active_user),
+        db: AsyncSession = Depends(database),
+):
+    """
+    Retrieve the trending images, ranked by engagement decayed by age.
+
+    The cursor for the next page is returned in the X-Next-Cursor header.
+
+    :param response: Response: The outgoing response, used for cursor headers.
+    :param limit: int: The page size.
+    :param cursor: str | None: The cursor of the page to continue from.
+    :param user: User: The current user.
+    :param db: AsyncSession: The database session.
+    :return: A list of feed items, hottest first.
+    """
+    return await ranking_page(Rankings.TRENDING, response, limit, cursor, db)
+
+
+@router.get("/{image_id}", response_model=ImageSchemaResponse)
 async def get_image(
         image_id: int,
         user: User = Depends(current_active_user),
@@ -63,26 +242,74 @@ async def get_image(
     """
     Retrieve an image by its ID.
 
+    The image carries its tag names and its like and comment counts; the comments
+    are paged by /comment/image/{image_id}.
+
     :param image_id: int: The ID of the image to retrieve.
     :param user: User: The current user.
     :param db: AsyncSession: The database session.
     :param cache: Redis: The Redis cache.
     :return: An image object.
     """
-    image = await ImageQuery.read(image_id, db)
-    if not image:
+    image = await ImageQuery.get_item(image_id, db)
+    if image is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Image not found!"
         )
     return image
 
 
+@router.get("/{image_id}/events")
+async def stream_image_events(
+        image_id: int,
+        user: User = Depends(current_active_user),
+        db: AsyncSession = Depends(database),
+):
+    """
+    Stream the comment and like events of an image as Server-Sent Events.
+
+    Every event has the type (comment.created, comment.updated, comment.deleted or
+    like.created) as its SSE event name and the JSON data as its payload. A comment
+    line is sent every EVENT_HEARTBEAT seconds to keep idle connections open.
+
+    :param image_id: int: The ID of the image.
+    :param user: User: The current user.
+    :param db: AsyncSession: The database session.
+    :return: A text/event-stream response.
+    """
+    if not await ImageQuery.exists(image_id, db):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Image not found!"
+        )
+    # The stream can stay open for hours; do not hold a pooled connection meanwhile.
+    await db.close()
+
+    async def events():
+        async with event_broker.subscribe(image_id) as queue:
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        queue.get(), timeout=settings.event_heartbeat
+                    )
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                yield message
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post(
     "/create", response_model=ImageSchemaResponse, status_code=status.HTTP_201_CREATED
 )
 async def create_image(
         title: str = Form(),
         image_file: UploadFile = File(),
+        background: bool = False,
         user: User = Depends(current_active_user),
         db: AsyncSession = Depends(database),
         cache: Redis = Depends(cache_database),
@@ -90,53 +317,180 @@ async def create_image(
     """
     Create a new image.
 
+    With background=true the upload is handed to a worker and the response is
+    202 with a job ID to poll at /image/jobs/{job_id}.
+
     :param title: str: The title of the image.
     :param image_file: UploadFile: The image file to upload.
+    :param background: bool: Whether to upload the image in a background job.
     :param user: User: The current user.
     :param db: AsyncSession: The database session.
     :param cache: Redis: The Redis cache.
-    :return: The created image object.
+    :return: The created image object, or the queued job.
     """
     access_service("can_add_image", user)
-    public_id = UploadImage.generate_name_folder(user)
-    r = UploadImage.upload(image_file.file, public_id)
-    src_url = UploadImage.get_pic_url(public_id, r)
-    image = await ImageQuery.create(title, src_url, user, db)
-    # owner_db = await id_user_auth(user.id, db)
-    owner = OwnerInfo(
-        id=user.id, email=user.email, username=user.username, avatar=user.avatar
-    )
-    response = ImageSchemaResponse(
-        owner=owner,
-        id=image.id,
-        title=image.title,
-        cloudinary_url=image.cloudinary_url,
-        rating=image.rating,
-        edited_cloudinary_url=image.edited_cloudinary_url,
-        created_at=image.created_at,
-        updated_at=image.updated_at,
+    if background:
+        payload = await image_file.read()
+        job_id = await job_store.create("upload", user.id, payload)
+        await asyncio.to_thread(
+            upload_image_task.apply_async,
+            args=[job_id, str(user.id), title],
+            task_id=job_id,
         )
+        return queued_job_response(job_id, "upload")
+    try:
+        image = await image_service.create_image(title, image_file.file, user, db)
+    except StorageError as e:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(e))
+    # owner_db = await id_user_auth(user.id, db)
+    return created_image_response(image, user)
+
+
+@router.post(
+    "/create/batch",
+    response_model=list[BatchUploadItemResponse],
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_images_batch(
+        titles: list[str] = Form(),
+        image_files: list[UploadFile] = File(),
+        user: User = Depends(current_active_user),
+        db: AsyncSession = Depends(database),
+        cache: Redis = Depends(cache_database),
+):
+    """
+    Create many images in one request.
+
+    Files are uploaded to storage concurrently and all images are recorded with a
+    single bulk insert. The response reports success or failure for every item.
 
+    :param titles: list[str]: The titles of the images, one per file.
+    :param image_files: list[UploadFile]: The image files to upload.
+    :param user: User: The current user.
+    :param db: AsyncSession: The database session.
+    :param cache: Redis: The Redis cache.
+    :return: The result of every item, in the order of the files.
+    """
+    access_service("can_add_image", user)
+    if len(titles) != len(image_files):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Every file needs a title!",
+        )
+    if len(image_files) > settings.batch_upload_max_files:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {settings.batch_upload_max_files} files per batch!",
+        )
+    results = await image_service.create_images(
+        [(title, image_file.file) for title, image_file in zip(titles, image_files)],
+        user,
+        db,
+    )
+    response = []
+    for index, (image_file, result) in enumerate(zip(image_files, results)):
+        if isinstance(result, str):
+            item = BatchUploadItemResponse(
+                index=index, filename=image_file.filename, status="failed", error=result
+            )
+        else:
+            item = BatchUploadItemResponse(
+                index=index,
+                filename=image_file.filename,
+                status="created",
+                image=created_image_response(result, user),
+            )
+        response.append(item)
     return response
 
 
-@router.get("/search/{image_search_string}")
+@router.post("/upload/sign", response_model=DirectUploadSchemaResponse)
+async def sign_direct_upload(
+        user: User = Depends(current_active_user),
+        cache: Redis = Depends(cache_database),
+):
+    """
+    Sign an upload that the client sends to storage directly.
+
+    The client posts the file together with the returned fields to upload_url, then
+    passes the public_id, version and signature of the storage response to
+    /image/upload/complete. The image bytes never pass through the API.
+
+    :param user: User: The current user.
+    :param cache: Redis: The Redis cache.
+    :return: The upload URL and the signed form fields.
+    """
+    access_service("can_add_image", user)
+    return await image_service.sign_direct_upload(user)
+
+
+@router.post(
+    "/upload/complete",
+    response_model=ImageSchemaResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def complete_direct_upload(
+        body: DirectUploadCompleteRequest,
+        user: User = Depends(current_active_user),
+        db: AsyncSession = Depends(database),
+        cache: Redis = Depends(cache_database),
+):
+    """
+    Record an image that the client uploaded to storage directly.
+
+    :param body: DirectUploadCompleteRequest: The title and the storage response.
+    :param user: User: The current user.
+    :param db: AsyncSession: The database session.
+    :param cache: Redis: The Redis cache.
+    :return: The created image object.
+    """
+    access_service("can_add_image", user)
+    try:
+        image = await image_service.complete_direct_upload(
+            body.title, body.public_id, body.version, body.signature, user, db
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return created_image_response(image, user)
+
+
+@router.get("/search/{image_search_string}", response_model=list[ImageSchemaResponse])
 async def search_image(
         image_search_string: str,
+        response: Response,
+        limit: int = Query(default=36, ge=1, le=100),
+        cursor: str | None = None,
+        direction: Literal["next", "prev"] = "next",
         user: User = Depends(current_active_user),
         db: AsyncSession = Depends(database),
         cache: Redis = Depends(cache_database),
 ):
     """
-    Search for images.
+    Search for images by title, tag names and comment text.
+
+    Results are ranked by relevance. Cursors for the next and previous pages are
+    returned in the X-Next-Cursor and X-Prev-Cursor headers.
 
-    :param image_search_string: str: The search string.
+    :param image_search_string: str: The search string, in websearch syntax.
+    :param response: Response: The outgoing response, used for cursor headers.
+    :param limit: int: The page size.
+    :param cursor: str | None: The cursor of the page to continue from.
+    :param direction: str: "next" or "prev", relative to the cursor.
     :param user: User: The current user.
     :param db: AsyncSession: The database session.
     :param cache: Redis: The Redis cache.
-    :return: Not implemented.
+    :return: A list of matching images.
     """
-    raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED)
+    try:
+        images, next_cursor, prev_cursor = await ImageQuery.search(
+            image_search_string, limit, cursor, direction == "prev", db
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor!"
+        )
+    set_cursor_headers(response, next_cursor, prev_cursor)
+    return images
 
 
 @router.put("/update/{image_id}", response_model=ImageSchemaResponse)
@@ -157,7 +511,7 @@ async def update_image(
     :param cache: Redis: The Redis cache.
     :return: The updated image object.
     """
-    image = await get_image(image_id, user, db, cache)
+    image = await find_image(image_id, db)
     access_service("can_update_image", user, image)
     image = await ImageQuery.update(image, db, image_data=image_data)
     return image
@@ -179,7 +533,7 @@ async def delete_image(
     :param cache: Redis: The Redis cache.
     :return: None.
     """
-    image = await get_image(image_id, user, db, cache)
+    image = await find_image(image_id, db)
     access_service("can_delete_image", user, image)
     await ImageQuery.delete(image, db)
 
@@ -191,6 +545,7 @@ async def delete_image(
 async def transform_image(
         image_id: int,
         transformation_data: EditFormData,
+        background: bool = False,
         user: User = Depends(current_active_user),
         db: AsyncSession = Depends(database),
         cache: Redis = Depends(cache_database),
@@ -200,26 +555,55 @@ async def transform_image(
 
     This endpoint allows users to apply transformations to an image, such as cropping, resizing, or adding filters.
     The transformed image is then stored and associated with the original image.
+    With background=true the work is handed to a worker and the response is 202 with
+    a job ID to poll at /image/jobs/{job_id}.
 
     :param image_id: int: The ID of the image to transform.
     :param transformation_data: EditFormData: The transformation data, including details of the desired transformations.
+    :param background: bool: Whether to transform the image in a background job.
     :param user: User: The current user.
     :param db: AsyncSession: The database session.
     :param cache: Redis: The Redis cache.
-    :return: The transformed image object.
+    :return: The transformed image object, or the queued job.
     """
-    image = await get_image(image_id, user, db, cache)
+    image = await find_image(image_id, db)
     access_service("can_update_image", user, image)
-    original_img_url = image.cloudinary_url
-    edited_img_url = await ImageEditor().edit_image(
-        original_img_url, transformation_data
-    )
-    public_id = UploadImage.generate_name_folder(user, edited=True)
-    r = UploadImage.upload(edited_img_url, public_id)
-    edited_src_url = UploadImage.get_pic_url(public_id, r)
-    image = await ImageQuery.update(image, db, edited_src_url)
+    if background:
+        job_id = await job_store.create("transform", user.id)
+        await asyncio.to_thread(
+            transform_image_task.apply_async,
+            args=[job_id, str(user.id), image.id, transformation_data.model_dump()],
+            task_id=job_id,
+        )
+        return queued_job_response(job_id, "transform")
+    try:
+        image = await image_service.transform_image(image, transformation_data, user, db)
+    except StorageError as e:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
     return image
 
+
+@router.get("/jobs/{job_id}", response_model=JobSchemaResponse)
+async def get_job(
+        job_id: str,
+        user: User = Depends(current_active_user),
+):
+    """
+    Get the status of a background upload or transformation job.
+
+    :param job_id: str: The ID of the job.
+    :param user: User: The current user.
+    :return: The job status and, once it succeeded, its result.
+    """
+    job = await job_store.get(job_id)
+    if not job or job["owner_id"] != str(user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Job not found!"
+        )
+    return job
+
 @router.post(
     "/like", status_code=status.HTTP_201_CREATED
 )
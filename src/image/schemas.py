@@ -4,6 +4,7 @@ from pydantic import BaseModel, Field, EmailStr
 from datetime import datetime
 
 from src.comment.schemas import CommentSchemaResponse
+from src.config import settings
 from src.database.sql.models import Tag, Comment
 from src.tag.schemas import TagSchemaResponse
 
@@ -25,8 +26,8 @@ class ImageAIReplaceTransformation(BaseModel):
 
 
 class ImageScaleTransformation(BaseModel):
-    Width: int = Field(default=0)
-    Height: int = Field(default=0)
+    Width: int = Field(default=0, ge=0, le=settings.transform_max_dimension)
+    Height: int = Field(default=0, ge=0, le=settings.transform_max_dimension)
 
     class Config:
         from_attributes: True
@@ -55,6 +56,28 @@ class EditFormData(BaseModel):
     rotation: typing.Optional[ImageRotationTransformation] = Field(default=None)
 
 
+class JobSchemaResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: str
+    result: dict | None = None
+    error: str | None = None
+
+
+class DirectUploadSchemaResponse(BaseModel):
+    upload_url: str
+    public_id: str
+    fields: dict[str, str]
+    expires_in: int
+
+
+class DirectUploadCompleteRequest(BaseModel):
+    title: str = Field()
+    public_id: str = Field()
+    version: int = Field()
+    signature: str = Field()
+
+
 class OwnerInfo(BaseModel):
     id: uuid.UUID
     email: EmailStr
@@ -85,9 +108,18 @@ class ImageSchemaResponse(BaseModel):
     title: str
     cloudinary_url: str
     edited_cloudinary_url: str | None
+    variants: dict[str, str] | None = None
     created_at: datetime
     updated_at: datetime | None
 
     class Config:
         from_attributes: True
         extra = "allow"
+
+
+class BatchUploadItemResponse(BaseModel):
+    index: int
+    filename: str | None
+    status: str
+    image: ImageSchemaResponse | None = None
+    error: str | None = None
@@ -0,0 +1,300 @@
+"""
+Image Service
+
+This module contains the image workflows that combine storage and database work.
+They are shared by the request handlers and the background workers.
+
+Class:
+- ImageService: Upload and transform images, and sign direct uploads.
+"""
+import asyncio
+import hashlib
+from collections import Counter
+from typing import IO
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.sql.models import Image, User
+from src.config import settings
+from src.database.cache.transform_cache import transform_cache
+from src.database.cache.upload_grants import upload_grants
+from src.image.repository import ImageQuery, AssetQuery, TransformationQuery
+from src.image.schemas import EditFormData
+from src.image.utils.cloudinary_service import UploadImage, ImageEditor
+from src.image.utils.storage_client import storage_client, StorageError
+from src.image.utils.transform_backends import select_backend
+
+
+class ImageService:
+    async def create_image(
+            self, title: str, file: IO | bytes, user: User, session: AsyncSession
+    ) -> Image:
+        """
+        Upload an image file and create its database record.
+
+        Storage is content-addressed: if the same bytes were uploaded before, the new
+        image points at the stored asset and nothing is uploaded.
+
+        :param title: str: The title of the image.
+        :param file: IO | bytes: The image file or its content.
+        :param user: User: The owner of the image.
+        :param session: AsyncSession: The database session.
+        :return: The created image object.
+        :raises StorageError: If the upload fails.
+        """
+        content = await self._read(file)
+        content_hash = hashlib.sha256(content).hexdigest()
+        asset = await AssetQuery.acquire(content_hash, session)
+        if asset is None:
+            public_id = UploadImage.generate_name_folder(user)
+            r = await UploadImage.upload(content, public_id, variants=True)
+            src_url = UploadImage.get_pic_url(public_id, r)
+            asset = await AssetQuery.register(content_hash, public_id, src_url, session)
+            if asset.public_id != public_id:
+                await self._discard(public_id)
+        return await ImageQuery.create(
+            title,
+            asset.cloudinary_url,
+            user,
+            session,
+            asset_id=asset.id,
+            variants=UploadImage.get_variant_urls(asset.public_id),
+        )
+
+    async def create_images(
+            self, items: list[tuple[str, IO | bytes]], user: User, session: AsyncSession
+    ) -> list[Image | str]:
+        """
+        Upload many image files and create their database records.
+
+        Uploads of new content run concurrently, bounded by BATCH_UPLOAD_CONCURRENCY.
+        No asset row is locked and no connection is held while they run. Assets and
+        images are then recorded with one bulk statement each and a single commit. A
+        failed upload only fails its own item.
+
+        :param items: list[tuple[str, IO | bytes]]: The title and file of every image.
+        :param user: User: The owner of the images.
+        :param session: AsyncSession: The database session.
+        :return: For every item, in order, the created image or an error message.
+        """
+        contents = await asyncio.gather(*(self._read(file) for _, file in items))
+        hashes = [hashlib.sha256(content).hexdigest() for content in contents]
+        known = await AssetQuery.exists_many(list(set(hashes)), session)
+        # End the read-only transaction so the connection is free during the uploads.
+        await session.commit()
+        semaphore = asyncio.Semaphore(settings.batch_upload_concurrency)
+        uploaded, errors = {}, {}
+
+        async def upload(content: bytes) -> tuple[str, str]:
+            async with semaphore:
+                public_id = UploadImage.generate_name_folder(user)
+                r = await UploadImage.upload(content, public_id, variants=True)
+                return public_id, UploadImage.get_pic_url(public_id, r)
+
+        async def upload_all(pending: dict[str, bytes]) -> None:
+            results = await asyncio.gather(
+                *(upload(content) for content in pending.values()), return_exceptions=True
+            )
+            for content_hash, result in zip(pending, results):
+                if isinstance(result, Exception):
+                    errors[content_hash] = str(result) or result.__class__.__name__
+                elif isinstance(result, BaseException):
+                    raise result
+                else:
+                    uploaded[content_hash] = result
+
+        await upload_all(
+            {
+                content_hash: content
+                for content_hash, content in zip(hashes, contents)
+                if content_hash not in known
+            }
+        )
+        references = Counter(hashes)
+        assets = await AssetQuery.acquire_many(
+            {content_hash: references[content_hash] for content_hash in known}, session
+        )
+        # Assets whose last reference was released since the lookup are gone from
+        # storage, so their content is uploaded again.
+        await upload_all(
+            {
+                content_hash: content
+                for content_hash, content in zip(hashes, contents)
+                if content_hash in known and content_hash not in assets
+            }
+        )
+        if len(errors) == len(references):
+            await session.commit()
+            return [errors[content_hash] for content_hash in hashes]
+        registered = await AssetQuery.register_many(
+            [
+                {
+                    "content_hash": content_hash,
+                    "public_id": public_id,
+                    "cloudinary_url": src_url,
+                    "ref_count": references[content_hash],
+                }
+                for content_hash, (public_id, src_url) in uploaded.items()
+            ],
+            session,
+        )
+        # A concurrent request that registered the same content first wins; its
+        # reference count was increased instead and our upload is a duplicate.
+        for content_hash, (public_id, _) in uploaded.items():
+            if registered[content_hash].public_id != public_id:
+                await self._discard(public_id)
+        registered.update(assets)
+
+        images = iter(
+            await ImageQuery.create_many(
+                [
+                    {
+                        "title": title,
+                        "cloudinary_url": registered[content_hash].cloudinary_url,
+                        "asset_id": registered[content_hash].id,
+                        "variants": UploadImage.get_variant_urls(
+                            registered[content_hash].public_id
+                        ),
+                    }
+                    for (title, _), content_hash in zip(items, hashes)
+                    if content_hash not in errors
+                ],
+                user,
+                session,
+            )
+        )
+        return [
+            errors[content_hash] if content_hash in errors else next(images)
+            for content_hash in hashes
+        ]
+
+    async def sign_direct_upload(self, user: User) -> dict:
+        """
+        Sign an upload that the client sends to storage directly.
+
+        The public ID is generated here, so the upload lands in the user's folder,
+        and a grant for it is kept until the upload is completed or expires.
+
+        :param user: User: The user who will upload the image.
+        :return: The upload URL and the signed form fields.
+        """
+        public_id = UploadImage.generate_name_folder(user)
+        fields = storage_client.signed_upload_params(
+            public_id,
+            overwrite=False,
+            eager="|".join(UploadImage.variant_transformations().values()),
+            eager_async=True,
+        )
+        await upload_grants.issue(public_id, user.id)
+        return {
+            "upload_url": storage_client.api_endpoint("upload"),
+            "public_id": public_id,
+            "fields": fields,
+            "expires_in": upload_grants.ttl,
+        }
+
+    async def complete_direct_upload(
+            self,
+            title: str,
+            public_id: str,
+            version: int,
+            signature: str,
+            user: User,
+            session: AsyncSession,
+    ) -> Image:
+        """
+        Record an image that the client uploaded to storage directly.
+
+        The grant is redeemed before the records are written, so two concurrent
+        completions cannot both record the upload. If writing them fails, the grant
+        is issued again and the client can retry.
+
+        :param title: str: The title of the image.
+        :param public_id: str: The public ID from the upload response.
+        :param version: int: The version from the upload response.
+        :param signature: str: The signature from the upload response.
+        :param user: User: The owner of the image.
+        :param session: AsyncSession: The database session.
+        :return: The created image object.
+        :raises ValueError: If the upload response is not valid for this user.
+        """
+        if not storage_client.verify_upload_signature(public_id, version, signature):
+            raise ValueError("Invalid upload signature")
+        if not await upload_grants.redeem(public_id, user.id):
+            raise ValueError("Upload was not signed for this user or has expired")
+        src_url = storage_client.build_url(public_id)
+        # The API never sees the bytes, so the asset is keyed by its public ID rather
+        # than its content; it is still removed from storage with its last image.
+        content_hash = hashlib.sha256(f"direct:{public_id}".encode()).hexdigest()
+        try:
+            asset = await AssetQuery.register(content_hash, public_id, src_url, session)
+            return await ImageQuery.create(
+                title,
+                src_url,
+                user,
+                session,
+                asset_id=asset.id,
+                variants=UploadImage.get_variant_urls(public_id),
+            )
+        except Exception:
+            # Nothing was recorded, so give the grant back and let the client retry.
+            await session.rollback()
+            await upload_grants.issue(public_id, user.id)
+            raise
+
+    @staticmethod
+    async def _read(file: IO | bytes) -> bytes:
+        if isinstance(file, bytes):
+            return file
+        file.seek(0)
+        return await asyncio.to_thread(file.read)
+
+    @staticmethod
+    async def _discard(public_id: str) -> None:
+        # Another request registered the same content first; drop our duplicate upload.
+        try:
+            await storage_client.destroy(public_id)
+        except StorageError as e:
+            print(f"Failed to remove duplicate upload {public_id}: {e}")
+
+    async def transform_image(
+            self,
+            image: Image,
+            transformation_data: EditFormData,
+            user: User,
+            session: AsyncSession,
+    ) -> Image:
+        """
+        Apply transformations to an image and store the result as its edited version.
+
+        Results are cached by the canonical hash of the source image and the
+        transformation data, so a repeated transformation reuses the stored result
+        without an upload or a generative call.
+
+        :param image: Image: The image to transform.
+        :param transformation_data: EditFormData: The transformations to apply.
+        :param user: User: The user requesting the transformation.
+        :param session: AsyncSession: The database session.
+        :return: The updated image object.
+        :raises StorageError: If the upload of the result fails.
+        """
+        source_public_id = ImageEditor.public_id_from_url(image.cloudinary_url)
+        spec_hash = ImageEditor.transformation_hash(source_public_id, transformation_data)
+        edited_src_url = await transform_cache.get(spec_hash)
+        if edited_src_url is None:
+            edited_src_url = await TransformationQuery.read(spec_hash, session)
+        if edited_src_url is None:
+            backend = select_backend(transformation_data)
+            public_id = UploadImage.generate_name_folder(user, edited=True)
+            edited_src_url = await backend.transform(
+                image.cloudinary_url, transformation_data, public_id
+            )
+            await TransformationQuery.create(
+                spec_hash, source_public_id, edited_src_url, session
+            )
+        image = await ImageQuery.update(image, session, edited_src_url)
+        await transform_cache.set(spec_hash, edited_src_url)
+        return image
+
+
+image_service = ImageService()
@@ -0,0 +1,64 @@
+"""
+Image Tasks
+
+This module contains the Celery tasks for image uploads and transformations.
+Each task reports its progress to the job store, which the job-status endpoint reads.
+
+Tasks:
+- upload_image_task: Upload a queued image file and create its database record.
+- transform_image_task: Apply queued transformations to an image.
+"""
+from src.auth.repository import id_user_auth
+from src.database.cache.jobs import job_store
+from src.database.sql.postgres import database
+from src.image.repository import ImageQuery
+from src.image.schemas import EditFormData
+from src.image.service import image_service
+from src.worker import celery_app, run_async
+
+
+async def _run_job(job_id: str, job):
+    await job_store.set_status(job_id, job_store.RUNNING)
+    try:
+        async with database.async_session() as session:
+            result = await job(session)
+    except Exception as e:
+        await job_store.set_status(job_id, job_store.FAILED, error=str(e))
+        raise
+    await job_store.set_status(job_id, job_store.SUCCEEDED, result=result)
+
+
+async def _upload_image(job_id: str, user_id: str, title: str):
+    async def job(session):
+        payload = await job_store.pop_payload(job_id)
+        if payload is None:
+            raise ValueError("Upload payload expired")
+        user = await id_user_auth(user_id, session)
+        image = await image_service.create_image(title, payload, user, session)
+        return {"image_id": image.id}
+
+    await _run_job(job_id, job)
+
+
+async def _transform_image(job_id: str, user_id: str, image_id: int, data: dict):
+    async def job(session):
+        user = await id_user_auth(user_id, session)
+        image = await ImageQuery.read(image_id, session)
+        if image is None:
+            raise ValueError("Image not found")
+        image = await image_service.transform_image(
+            image, EditFormData(**data), user, session
+        )
+        return {"image_id": image.id, "edited_cloudinary_url": image.edited_cloudinary_url}
+
+    await _run_job(job_id, job)
+
+
+@celery_app.task(name="image.upload")
+def upload_image_task(job_id: str, user_id: str, title: str):
+    run_async(_upload_image, job_id, user_id, title)
+
+
+@celery_app.task(name="image.transform")
+def transform_image_task(job_id: str, user_id: str, image_id: int, data: dict):
+    run_async(_transform_image, job_id, user_id, image_id, data)
@@ -1,3 +1,5 @@
+import hashlib
+import json
 import re
 import uuid
 from datetime import datetime
@@ -7,6 +9,7 @@ import cloudinary.uploader
 from src.config import settings
 from src.database.sql.models import User
 from src.image.schemas import EditFormData
+from src.image.utils.storage_client import storage_client
 
 
 class UploadImage:
@@ -28,30 +31,98 @@ class UploadImage:
         )
 
     @staticmethod
-    def upload(file, public_id: str):
-        r = cloudinary.uploader.upload(file, public_id=public_id, overwrite=True)
+    async def upload(file, public_id: str, variants: bool = False):
+        options = {}
+        if variants:
+            options = {
+                "eager": "|".join(UploadImage.variant_transformations().values()),
+                "eager_async": True,
+            }
+        r = await storage_client.upload(file, public_id, **options)
         return r
 
+    @staticmethod
+    def variant_transformations() -> dict[str, str]:
+        transformations = {}
+        for name, transformation in settings.image_variants.items():
+            transformations[name] = transformation
+            for image_format in settings.image_variant_formats:
+                transformations[f"{name}_{image_format}"] = f"{transformation},f_{image_format}"
+        return transformations
+
+    @staticmethod
+    def get_variant_urls(public_id: str) -> dict[str, str]:
+        return {
+            name: storage_client.build_url(public_id, transformation)
+            for name, transformation in UploadImage.variant_transformations().items()
+        }
+
+    @staticmethod
+    async def download(img_url: str) -> bytes:
+        return await storage_client.download(img_url)
+
     @staticmethod
     def get_pic_url(public_id, r):
-        src_url = cloudinary.CloudinaryImage(public_id).build_url(
-            # version=r.get("version")
-        )
+        src_url = storage_client.build_url(public_id)
         return src_url
 
 
 class ImageEditor(UploadImage):
+    @staticmethod
+    def public_id_from_url(img_url: str) -> str:
+        match = re.search(r"Memento/(.*)/(\d{2}-\d{2}-\d{4})/(.*)", img_url)
+        if not match:
+            raise ValueError("Invalid URL format")
+        return match.group()
+
+    @staticmethod
+    def canonical_transformation(edit_data: EditFormData) -> dict:
+        """
+        Normalize transformation data so equivalent requests compare equal.
+
+        Operations that would not change the image are dropped, in the same way
+        _edit_image_cloudinary skips them.
+
+        :param edit_data: EditFormData: The requested transformations.
+        :return: A dictionary with only the effective operations.
+        """
+        spec = {}
+        if (
+            edit_data.ai_replace
+            and edit_data.ai_replace.Object_to_detect
+            and edit_data.ai_replace.Replace_with
+        ):
+            spec["ai_replace"] = [
+                edit_data.ai_replace.Object_to_detect.strip().lower(),
+                edit_data.ai_replace.Replace_with.strip().lower(),
+            ]
+        if edit_data.scale and edit_data.scale.Width != 0:
+            spec["scale"] = [edit_data.scale.Width, edit_data.scale.Height]
+        if edit_data.black_and_white and edit_data.black_and_white.black_and_white:
+            spec["black_and_white"] = True
+        if edit_data.rotation and edit_data.rotation.angle % 360:
+            spec["rotation"] = edit_data.rotation.angle % 360
+        return spec
+
+    @staticmethod
+    def transformation_hash(public_id: str, edit_data: EditFormData) -> str:
+        """
+        Hash a source image and its normalized transformation data.
+
+        :param public_id: str: The public ID of the source image.
+        :param edit_data: EditFormData: The requested transformations.
+        :return: The SHA-256 hex digest that identifies the transformation result.
+        """
+        spec = ImageEditor.canonical_transformation(edit_data)
+        raw = json.dumps([public_id, spec], sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
     async def edit_image(
         self,
         original_img_url: str,
         edit_data: EditFormData,
     ):
-        match = re.search(r"Memento/(.*)/(\d{2}-\d{2}-\d{4})/(.*)", original_img_url)
-        if not match:
-            raise ValueError("Invalid URL format")
-
-        public_id = match.group()
-        print(public_id)
+        public_id = self.public_id_from_url(original_img_url)
 
         if edit_data:
             image_edit_html = await self._edit_image_cloudinary(public_id, edit_data)
@@ -0,0 +1,245 @@
+"""
+Storage Client
+
+This module contains a native async client for the Cloudinary upload API.
+
+All requests go through one pooled aiohttp session per process, so uploads never
+block the event loop and connections to the storage API are reused. Transient
+failures (connection errors, timeouts, 429 and 5xx responses) are retried with
+exponential backoff.
+
+Classes:
+- StorageError: Raised when the storage API rejects a request or stays unavailable.
+- StorageClient: Upload, download, delete and build URLs of stored images.
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import random
+import time
+from typing import IO
+
+import aiohttp
+
+from src.config import settings
+
+
+class StorageError(Exception):
+    pass
+
+
+class StorageClient:
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    UNSIGNED_PARAMS = {"file", "api_key", "resource_type", "cloud_name"}
+
+    def __init__(self):
+        self.cloud_name = settings.cloudinary_name
+        self.api_key = str(settings.cloudinary_api_key)
+        self.api_secret = settings.cloudinary_api_secret
+        self.api_url = settings.cloudinary_api_url.rstrip("/")
+        self.delivery_url = settings.cloudinary_delivery_url.rstrip("/")
+        self.timeout = aiohttp.ClientTimeout(total=settings.cloudinary_timeout)
+        self.retries = settings.cloudinary_retries
+        self.backoff = settings.cloudinary_backoff
+        self.pool_size = settings.cloudinary_pool_size
+        self.session: aiohttp.ClientSession | None = None
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """
+        Get the shared HTTP session, creating it on first use.
+
+        :return: The pooled aiohttp session.
+        """
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=self.timeout,
+            )
+        return self.session
+
+    async def close(self) -> None:
+        """
+        Close the shared HTTP session.
+
+        :return: None.
+        """
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    def sign(self, params: dict) -> str:
+        """
+        Sign request parameters the way the Cloudinary API expects.
+
+        :param params: dict: The request parameters.
+        :return: The hex SHA-1 signature.
+        """
+        to_sign = "&".join(
+            f"{key}={value}"
+            for key, value in sorted(params.items())
+            if key not in self.UNSIGNED_PARAMS and value not in (None, "")
+        )
+        return hashlib.sha1(f"{to_sign}{self.api_secret}".encode()).hexdigest()
+
+    def _signed_params(self, params: dict) -> dict:
+        params = {
+            key: str(value).lower() if isinstance(value, bool) else str(value)
+            for key, value in params.items()
+            if value is not None
+        }
+        params["timestamp"] = str(int(time.time()))
+        params["signature"] = self.sign(params)
+        params["api_key"] = self.api_key
+        return params
+
+    def api_endpoint(self, action: str) -> str:
+        """
+        Build the URL of an upload API action.
+
+        :param action: str: The API action, e.g. "upload".
+        :return: The endpoint URL.
+        """
+        return f"{self.api_url}/v1_1/{self.cloud_name}/image/{action}"
+
+    def signed_upload_params(self, public_id: str, **options) -> dict:
+        """
+        Sign the form fields of an upload that a client sends to storage directly.
+
+        The signature covers the public ID and every option, so the client cannot
+        upload under another path or change the upload parameters.
+
+        :param public_id: str: The public ID the client must upload under.
+        :param options: Extra upload API parameters.
+        :return: The form fields to send along with the file.
+        """
+        return self._signed_params({"public_id": public_id, **options})
+
+    def verify_upload_signature(self, public_id: str, version, signature: str) -> bool:
+        """
+        Verify the signature of an upload API response.
+
+        Storage signs the public ID and version of every upload, so a client can
+        prove that an upload it reports really happened.
+
+        :param public_id: str: The public ID from the upload response.
+        :param version: The version from the upload response.
+        :param signature: str: The signature from the upload response.
+        :return: True if the signature is valid.
+        """
+        expected = hashlib.sha1(
+            f"public_id={public_id}&version={version}{self.api_secret}".encode()
+        ).hexdigest()
+        return hmac.compare_digest(expected, signature)
+
+    async def _post(self, action: str, params: dict, file=None) -> dict:
+        url = self.api_endpoint(action)
+        session = await self.get_session()
+        if file is not None and not isinstance(file, (str, bytes)):
+            # Read once off the event loop: aiohttp closes file payloads after sending,
+            # and retries need to resend the same bytes.
+            file.seek(0)
+            file = await asyncio.to_thread(file.read)
+        for attempt in range(self.retries + 1):
+            form = aiohttp.FormData()
+            for key, value in self._signed_params(params).items():
+                form.add_field(key, value)
+            if isinstance(file, str):
+                form.add_field("file", file)
+            elif file is not None:
+                form.add_field("file", file, filename="upload")
+            try:
+                async with session.post(url, data=form) as response:
+                    if response.status in self.RETRY_STATUSES and attempt < self.retries:
+                        await self._sleep(attempt)
+                        continue
+                    if response.status >= 400:
+                        text = await response.text(errors="replace")
+                        raise StorageError(self._error_message(text, response.status))
+                    try:
+                        return await response.json(content_type=None)
+                    except ValueError:
+                        raise StorageError("Storage returned an invalid response")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    raise StorageError(f"Storage is unavailable: {e!r}")
+                await self._sleep(attempt)
+        raise StorageError("Storage is unavailable")
+
+    @staticmethod
+    def _error_message(text: str, status: int) -> str:
+        # Error bodies are not always JSON: proxies answer with HTML pages and some
+        # 4xx responses are empty.
+        try:
+            body = json.loads(text)
+        except ValueError:
+            body = None
+        error = body.get("error") if isinstance(body, dict) else None
+        message = error.get("message") if isinstance(error, dict) else None
+        return message or f"Storage error {status}"
+
+    async def _sleep(self, attempt: int) -> None:
+        await asyncio.sleep(self.backoff * 2**attempt * random.uniform(0.5, 1.5))
+
+    async def upload(self, file: IO | bytes | str, public_id: str, **options) -> dict:
+        """
+        Upload an image.
+
+        :param file: IO | bytes | str: A file object, raw bytes or a remote URL.
+        :param public_id: str: The public ID to store the image under.
+        :param options: Extra upload API parameters.
+        :return: The upload API response.
+        :raises StorageError: If the upload fails.
+        """
+        params = {"public_id": public_id, "overwrite": True, **options}
+        return await self._post("upload", params, file)
+
+    async def destroy(self, public_id: str) -> dict:
+        """
+        Delete an image.
+
+        :param public_id: str: The public ID of the image.
+        :return: The destroy API response.
+        :raises StorageError: If the request fails.
+        """
+        return await self._post("destroy", {"public_id": public_id, "invalidate": True})
+
+    async def download(self, url: str) -> bytes:
+        """
+        Download a stored image.
+
+        :param url: str: The delivery URL of the image.
+        :return: The image content.
+        :raises StorageError: If the download fails.
+        """
+        session = await self.get_session()
+        for attempt in range(self.retries + 1):
+            try:
+                async with session.get(url) as response:
+                    if response.status in self.RETRY_STATUSES and attempt < self.retries:
+                        await self._sleep(attempt)
+                        continue
+                    if response.status >= 400:
+                        raise StorageError(f"Storage error {response.status}")
+                    return await response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    raise StorageError(f"Storage is unavailable: {e!r}")
+                await self._sleep(attempt)
+        raise StorageError("Storage is unavailable")
+
+    def build_url(self, public_id: str, transformation: str | None = None) -> str:
+        """
+        Build the delivery URL of an image.
+
+        :param public_id: str: The public ID of the image.
+        :param transformation: str | None: A transformation string, e.g. "c_limit,w_200".
+        :return: The delivery URL.
+        """
+        prefix = f"{self.delivery_url}/{self.cloud_name}/image/upload"
+        if transformation:
+            return f"{prefix}/{transformation}/{public_id}"
+        return f"{prefix}/{public_id}"
+
+
+storage_client = StorageClient()
@@ -0,0 +1,83 @@
+"""
+Storage Stub
+
+A local HTTP stand-in for the parts of the Cloudinary API used by StorageClient:
+upload, destroy and delivery of stored images. It keeps images in memory and can
+add artificial latency, so upload throughput can be load-tested without a real
+storage account.
+
+Run it with ``python -m src.image.utils.storage_stub --port 9000 --latency 0.3`` and
+point CLOUDINARY_API_URL and CLOUDINARY_DELIVERY_URL at ``http://127.0.0.1:9000``.
+"""
+import argparse
+import asyncio
+import time
+
+import aiohttp
+from aiohttp import web
+
+
+def create_app(latency: float = 0.0) -> web.Application:
+    """
+    Create the stand-in application.
+
+    :param latency: float: Seconds to wait before answering an API call.
+    :return: The aiohttp application.
+    """
+    images: dict[str, bytes] = {}
+
+    async def upload(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        form = await request.post()
+        public_id = form.get("public_id")
+        file = form.get("file")
+        if not public_id or file is None:
+            return web.json_response({"error": {"message": "Missing file"}}, status=400)
+        if isinstance(file, str):
+            async with aiohttp.ClientSession() as session:
+                async with session.get(file) as response:
+                    data = await response.read()
+        else:
+            data = file.file.read()
+        images[public_id] = data
+        cloud_name = request.match_info["cloud_name"]
+        url = f"{request.scheme}://{request.host}/{cloud_name}/image/upload/{public_id}"
+        return web.json_response(
+            {
+                "public_id": public_id,
+                "version": int(time.time()),
+                "bytes": len(data),
+                "url": url,
+                "secure_url": url,
+            }
+        )
+
+    async def destroy(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        form = await request.post()
+        found = images.pop(form.get("public_id"), None) is not None
+        return web.json_response({"result": "ok" if found else "not found"})
+
+    async def deliver(request: web.Request) -> web.Response:
+        # Delivery paths may carry transformation segments before the public ID.
+        parts = request.match_info["public_id"].split("/")
+        for start in range(len(parts)):
+            data = images.get("/".join(parts[start:]))
+            if data is not None:
+                return web.Response(body=data, content_type="application/octet-stream")
+        raise web.HTTPNotFound()
+
+    app = web.Application(client_max_size=64 * 1024**2)
+    app.router.add_post("/v1_1/{cloud_name}/image/upload", upload)
+    app.router.add_post("/v1_1/{cloud_name}/image/destroy", destroy)
+    app.router.add_get("/{cloud_name}/image/upload/{public_id:.*}", deliver)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local storage API stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+    web.run_app(create_app(args.latency), host=args.host, port=args.port)
@@ -0,0 +1,163 @@
+"""
+Transform Backends
+
+This module contains the backends that apply EditFormData transformations.
+
+Scaling, rotation and black-and-white are plain raster operations and run locally
+with Pillow in a process pool, so they cost no remote round trip and do not hold
+the event loop. Generative replacement is only available on Cloudinary.
+
+Classes:
+- CloudinaryBackend: Apply transformations through Cloudinary URL transformations.
+- LocalBackend: Apply raster transformations in a local process pool.
+
+Functions:
+- process_image: Apply raster transformations to image bytes.
+- select_backend: Pick the backend for a transformation request.
+"""
+import asyncio
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image as PILImage, ImageOps
+
+from src.config import settings
+from src.image.schemas import EditFormData
+from src.image.utils.cloudinary_service import UploadImage, ImageEditor
+
+
+def process_image(content: bytes, spec: dict) -> bytes:
+    """
+    Apply raster transformations to image bytes.
+
+    Operations run in the same order as the Cloudinary transformation chain.
+
+    :param content: bytes: The source image.
+    :param spec: dict: A canonical transformation spec from ImageEditor.
+    :return: The transformed image, encoded in the source format when possible.
+    :raises ValueError: If the target size is empty or above TRANSFORM_MAX_DIMENSION.
+    """
+    image = PILImage.open(io.BytesIO(content))
+    image_format = image.format or "PNG"
+    image = ImageOps.exif_transpose(image)
+    if "scale" in spec:
+        width, height = spec["scale"]
+        if not height and width:
+            height = max(1, round(image.height * width / image.width))
+        max_dimension = settings.transform_max_dimension
+        if not 0 < width <= max_dimension or not 0 < height <= max_dimension:
+            raise ValueError(
+                f"Scaled size {width}x{height} must be between 1 and {max_dimension} "
+                f"pixels on each side"
+            )
+        image = image.resize((width, height), PILImage.LANCZOS)
+    if spec.get("black_and_white"):
+        image = ImageOps.grayscale(image)
+    if "rotation" in spec:
+        # Cloudinary rotates clockwise, Pillow counter-clockwise.
+        image = image.rotate(-spec["rotation"], expand=True)
+    if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    output = io.BytesIO()
+    image.save(output, format=image_format)
+    return output.getvalue()
+
+
+class CloudinaryBackend:
+    name = "cloudinary"
+
+    def supports(self, edit_data: EditFormData) -> bool:
+        return True
+
+    async def transform(
+            self, original_img_url: str, edit_data: EditFormData, public_id: str
+    ) -> str:
+        """
+        Transform an image through a Cloudinary URL transformation and store the result.
+
+        :param original_img_url: str: The URL of the source image.
+        :param edit_data: EditFormData: The transformations to apply.
+        :param public_id: str: The public ID to store the result under.
+        :return: The URL of the stored result.
+        :raises StorageError: If the upload of the result fails.
+        """
+        edited_img_url = await ImageEditor().edit_image(original_img_url, edit_data)
+        r = await UploadImage.upload(edited_img_url, public_id)
+        return UploadImage.get_pic_url(public_id, r)
+
+
+class LocalBackend:
+    name = "local"
+
+    def __init__(self, workers: int | None = settings.transform_workers or None):
+        self.workers = workers or os.cpu_count()
+        self.executor: ProcessPoolExecutor | None = None
+
+    def supports(self, edit_data: EditFormData) -> bool:
+        return "ai_replace" not in ImageEditor.canonical_transformation(edit_data)
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self.executor
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def transform(
+            self, original_img_url: str, edit_data: EditFormData, public_id: str
+    ) -> str:
+        """
+        Transform an image in the local process pool and store the result.
+
+        :param original_img_url: str: The URL of the source image.
+        :param edit_data: EditFormData: The transformations to apply.
+        :param public_id: str: The public ID to store the result under.
+        :return: The URL of the stored result.
+        :raises StorageError: If the download of the source or the upload fails.
+        :raises ValueError: If the transformation is empty or out of bounds.
+        """
+        spec = ImageEditor.canonical_transformation(edit_data)
+        if not spec:
+            raise ValueError("No transformation specified")
+        content = await UploadImage.download(original_img_url)
+        if multiprocessing.current_process().daemon:
+            # Daemonic processes (e.g. Celery prefork workers) cannot start a pool.
+            edited = await asyncio.to_thread(process_image, content, spec)
+        else:
+            loop = asyncio.get_running_loop()
+            try:
+                edited = await loop.run_in_executor(
+                    self.get_executor(), process_image, content, spec
+                )
+            except BrokenProcessPool:
+                # A worker died (e.g. killed for memory), which breaks the whole
+                # pool. Drop it so the next transformation starts a fresh one.
+                self.shutdown()
+                raise
+        r = await UploadImage.upload(edited, public_id)
+        return UploadImage.get_pic_url(public_id, r)
+
+
+cloudinary_backend = CloudinaryBackend()
+local_backend = LocalBackend()
+
+
+def select_backend(edit_data: EditFormData):
+    """
+    Pick the backend for a transformation request.
+
+    :param edit_data: EditFormData: The requested transformations.
+    :return: The local backend when it is enabled and supports every requested
+        operation, otherwise the Cloudinary backend.
+    """
+    if settings.transform_backend == local_backend.name and local_backend.supports(
+        edit_data
+    ):
+        return local_backend
+    return cloudinary_backend
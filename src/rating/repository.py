@@ -3,37 +3,113 @@ Rating Repository
 
 This module contains database query functions related to ratings.
 
+Every write changes the rating and the rating_sum, rating_count, average rating
+and 1-5 histogram of its image in a single statement, so the cost does not depend
+on how many ratings an image has and concurrent raters cannot overwrite each other.
+A rating that is replaced is locked first, so the value it is replaced with is
+applied against its committed value rather than a stale snapshot.
+
 Functions:
-- _update_average_rating: Update the average rating of an image based on all available ratings.
+- _image_totals: Build the image update that applies a rating change.
 - read: Retrieve a rating object from the database by its ID.
+- stats: Retrieve the rating stats of many images.
 - create: Create a new rating for an image or update the user's previous rating.
 - update: Update a rating in the database.
 - delete: Delete a rating from the database.
 """
-from sqlalchemy import select
+from sqlalchemy import select, update, delete, case, func, cast, literal, Numeric
+from sqlalchemy.dialects.postgresql import insert, array
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.database.cache.feed_cache import feed_cache
+from src.database.cache.rankings import rankings
 from src.database.sql.models import User, Rating, Image
-from src.image.repository import ImageQuery
+from src.image.repository import RANKING_COLUMNS
 
 
 class RatingQuery:
-    @classmethod
-    async def _update_average_rating(cls, image: Image, db: AsyncSession):
+    @staticmethod
+    def _image_totals(changed, added=None, removed=None):
         """
-        Update the average rating of an image based on all available ratings.
+        Build the image update that applies a rating change.
 
-        :param cls: The class of the object being updated.
-        :param image: Image: The image object to update.
-        :param db: AsyncSession: The database session.
-        :return: Nothing.
+        :param changed: The CTE with the changed rating rows.
+        :param added: The rating value that was added, or None.
+        :param removed: The rating value that was replaced or deleted, or None.
+            NULL in SQL is treated as no value.
+        :return: An UPDATE statement returning the changed rating.
     """
-        ratings = await db.execute(select(Rating).filter(Rating.image_id == image.id))
-        ratings = ratings.scalars().all()
-        total_rating = sum(rating.value for rating in ratings)
-        average_rating = total_rating / len(ratings) if ratings else 0
-        image.rating = average_rating
+
+        def counted(value, match=None):
+            if value is None:
+                return 0
+            if match is None:
+                return case((value.is_not(None), 1), else_=0)
+            return case((value == match, 1), else_=0)
+
+        def total(value):
+            return 0 if value is None else func.coalesce(value, 0)
+
+        rating_sum = Image.rating_sum + total(added) - total(removed)
+        rating_count = Image.rating_count + counted(added) - counted(removed)
+        average = func.coalesce(
+            func.round(cast(rating_sum, Numeric) / func.nullif(rating_count, 0), 2), 0
+        )
+        # The histogram is rebuilt as a whole: an UPDATE cannot assign two elements
+        # of the same array column.
+        histogram = array(
+            [
+                Image.rating_histogram[value] + counted(added, value) - counted(removed, value)
+                for value in range(1, 6)
+            ]
+        )
+        return (
+            update(Image)
+            .where(Image.id == changed.c.image_id)
+            .values(
+                rating_sum=rating_sum,
+                rating_count=rating_count,
+                rating=average,
+                rating_histogram=histogram,
+            )
+            .returning(
+                changed.c.id,
+                changed.c.owner_id,
+                changed.c.image_id,
+                changed.c.value,
+                *RANKING_COLUMNS,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    async def _apply(stmt, db: AsyncSession) -> Rating | None:
+        row = (await db.execute(stmt)).one_or_none()
         await db.commit()
+        if row is None:
+            return None
+        await feed_cache.invalidate()
+        await rankings.update(row.image_id, row)
+        return Rating(id=row.id, owner_id=row.owner_id, image_id=row.image_id, value=row.value)
+
+    @staticmethod
+    async def _lock_value(condition, db: AsyncSession) -> int | None:
+        # The lock is held until _apply commits, so no concurrent write can change
+        # or delete the rating in between.
+        return await db.scalar(select(Rating.value).where(condition).with_for_update())
+
+    @staticmethod
+    async def _replace(condition, value: int, previous: int, db: AsyncSession) -> Rating | None:
+        updated = (
+            update(Rating)
+            .where(condition)
+            .values(value=value)
+            .returning(Rating.id, Rating.owner_id, Rating.image_id, Rating.value)
+            .cte("updated")
+        )
+        return await RatingQuery._apply(
+            RatingQuery._image_totals(updated, updated.c.value, literal(previous)), db
+        )
 
     @staticmethod
     async def read(rating_id: int, db: AsyncSession) -> Rating | None:
@@ -49,6 +125,27 @@ class RatingQuery:
         rating = rating.scalar_one_or_none()
         return rating
 
+    @staticmethod
+    async def stats(image_ids: list[int], db: AsyncSession) -> list:
+        """
+        Retrieve the average, count and 1-5 histogram of the ratings of many images.
+
+        The stats are read from the counters on the images table, so no rating rows
+        are loaded.
+
+        :param image_ids: list[int]: The IDs of the images.
+        :param db: AsyncSession: The database session.
+        :return: Rows with image_id, average, count and histogram, one per existing image.
+        """
+        stmt = select(
+            Image.id.label("image_id"),
+            Image.rating.label("average"),
+            Image.rating_count.label("count"),
+            Image.rating_histogram.label("histogram"),
+        ).where(Image.id.in_(image_ids))
+        stats = await db.execute(stmt)
+        return list(stats.all())
+
     @staticmethod
     async def create(body, user: User, image: Image, db: AsyncSession) -> Rating:
         """
@@ -61,20 +158,24 @@ class RatingQuery:
         :param db: AsyncSession: Create a database session.
         :return: The rating object that was created.
     """
-        rating = await db.scalar(
-            select(Rating).where(
-                (Rating.owner_id == user.id) & (Rating.image_id == image.id)
+        condition = (Rating.owner_id == user.id) & (Rating.image_id == image.id)
+        while True:
+            previous = await RatingQuery._lock_value(condition, db)
+            if previous is not None:
+                return await RatingQuery._replace(condition, body.value, previous, db)
+            inserted = (
+                insert(Rating)
+                .values(owner_id=user.id, image_id=image.id, value=body.value)
+                .on_conflict_do_nothing(index_elements=[Rating.owner_id, Rating.image_id])
+                .returning(Rating.id, Rating.owner_id, Rating.image_id, Rating.value)
+                .cte("inserted")
             )
-        )
-        if rating:
-            rating.value = body.value
-        else:
-            rating = Rating(**body.model_dump(), owner_id=user.id)
-        db.add(rating)
-        await db.commit()
-        await db.refresh(rating)
-        await RatingQuery._update_average_rating(image, db)
-        return rating
+            rating = await RatingQuery._apply(
+                RatingQuery._image_totals(inserted, inserted.c.value), db
+            )
+            if rating is not None:
+                return rating
+            # A concurrent request inserted the rating first; replace its value.
 
     @staticmethod
     async def update(rating_id: int, body, user, db) -> Rating | None:
@@ -92,19 +193,12 @@ class RatingQuery:
     :param db: Access the database
     :return: The updated rating or None if it doesn't exist.
     """
-        rating = await db.scalar(
-            select(Rating).where(
-                (Rating.owner_id == user.id) & (Rating.id == rating_id)
-            )
-        )
-        if not rating:
+        condition = (Rating.owner_id == user.id) & (Rating.id == rating_id)
+        previous = await RatingQuery._lock_value(condition, db)
+        if previous is None:
+            await db.rollback()
             return None
-        rating.value = body.value
-        await db.commit()
-        await db.refresh(rating)
-        image = await db.get(Image, rating.image_id)
-        await RatingQuery._update_average_rating(image, db)
-        return rating
+        return await RatingQuery._replace(condition, body.value, previous, db)
 
     @staticmethod
     async def delete(rating_id: int, user, db: AsyncSession):
@@ -116,15 +210,12 @@ class RatingQuery:
         :param db: AsyncSession: Pass in the database session.
         :return: The deleted rating or None if it doesn't exist.
     """
-        rating = await db.scalar(
-            select(Rating).where(
-                (Rating.owner_id == user.id) & (Rating.id == rating_id)
-            )
+        deleted = (
+            delete(Rating)
+            .where((Rating.owner_id == user.id) & (Rating.id == rating_id))
+            .returning(Rating.id, Rating.owner_id, Rating.image_id, Rating.value)
+            .cte("deleted")
+        )
+        return await RatingQuery._apply(
+            RatingQuery._image_totals(deleted, removed=deleted.c.value), db
         )
-        if not rating:
-            return None
-        await db.delete(rating)
-        await db.commit()
-        image = await ImageQuery.read(rating.image_id, db)
-        await RatingQuery._update_average_rating(image, db)
-        return rating
@@ -4,6 +4,8 @@ Rating Routes
 This module defines the API routes for managing ratings.
 
 Routes:
+- GET /rating/stats: Get the rating stats of many images.
+- GET /rating/stats/{image_id}: Get the rating stats of an image.
 - GET /rating/{rating_id}: Delete a rating by its ID.
 - POST /rating/create: Create a new rating.
 - PUT /rating/update/{rating_id}: Update an existing rating.
@@ -11,22 +13,94 @@ Routes:
 
 Each route expects specific parameters and returns HTTP status codes.
 """
-from fastapi import APIRouter, Depends, status, HTTPException, Path
+from fastapi import APIRouter, Depends, status, HTTPException, Path, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.auth.service import current_active_user
 from src.database.sql.models import User
 from src.database.sql.postgres import database
-from src.image.routes import get_image
+from src.image.routes import find_image
 from src.rating.repository import RatingQuery
 from src.rating.schemas import (
     RatingSchemaResponse,
     RatingSchemaRequest,
     RatingUpdateSchemaRequest,
+    RatingStatsSchemaResponse,
 )
 
 router = APIRouter(prefix="/rating", tags=["ratings"])
 
+MAX_STATS_IMAGES = 100
+
+
+def rating_stats(row) -> RatingStatsSchemaResponse:
+    return RatingStatsSchemaResponse(
+        image_id=row.image_id,
+        average=row.average,
+        count=row.count,
+        histogram={value: count for value, count in enumerate(row.histogram, start=1)},
+    )
+
+
+@router.get(
+    "/stats",
+    response_model=list[RatingStatsSchemaResponse],
+    name="Get rating stats of many images",
+)
+async def get_rating_stats_batch(
+        image_ids: list[int] = Query(),
+        user: User = Depends(current_active_user),
+        db: AsyncSession = Depends(database),
+):
+    """
+    Get the average, count and 1-5 histogram of the ratings of many images.
+
+    Images that do not exist are left out of the result.
+
+    :param image_ids: list[int]: The IDs of the images, e.g. ?image_ids=1&image_ids=2.
+    :param user: User: The current user obtained from authentication.
+    :param db: AsyncSession: The database session.
+
+    :return: list[RatingStatsSchemaResponse]: The stats, in the order of image_ids.
+    """
+    if len(image_ids) > MAX_STATS_IMAGES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {MAX_STATS_IMAGES} images per request!",
+        )
+    stats = {row.image_id: row for row in await RatingQuery.stats(image_ids, db)}
+    return [
+        rating_stats(stats[image_id]) for image_id in dict.fromkeys(image_ids)
+        if image_id in stats
+    ]
+
+
+@router.get(
+    "/stats/{image_id}",
+    response_model=RatingStatsSchemaResponse,
+    name="Get rating stats of an image",
+)
+async def get_rating_stats(
+        image_id: int = Path(ge=1),
+        user: User = Depends(current_active_user),
+        db: AsyncSession = Depends(database),
+):
+    """
+    Get the average, count and 1-5 histogram of the ratings of an image.
+
+    :param image_id: int: The ID of the image.
+    :param user: User: The current user obtained from authentication.
+    :param db: AsyncSession: The database session.
+
+    :return: RatingStatsSchemaResponse: The rating stats.
+    """
+    stats = await RatingQuery.stats([image_id], db)
+    if not stats:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Image not found!"
+        )
+    return rating_stats(stats[0])
+
 
 @router.get("/{rating_id}", response_model=RatingSchemaResponse, name="Get one rating")
 async def get_rating(
@@ -72,7 +146,7 @@ async def create_rating(
 
     :return: RatingSchemaResponse: The created or updated rating object.
     """
-    image = await get_image(body.image_id, user, db)
+    image = await find_image(body.image_id, db)
     rating = await RatingQuery.create(body, user, image, db)
     return rating
 
@@ -12,6 +12,16 @@ class RatingUpdateSchemaRequest(BaseModel):
     value: int = Field(ge=1, le=5)
 
 
+class RatingStatsSchemaResponse(BaseModel):
+    image_id: int
+    average: float
+    count: int
+    histogram: dict[int, int]
+
+    class Config:
+        from_attributes: True
+
+
 class RatingSchemaResponse(RatingSchemaRequest):
     id: int
     owner_id: uuid.UUID
@@ -9,84 +9,347 @@ Class:
 
 Methods:
 
-- create(image: Image, tag_schema: TagSchemaRequest, session: AsyncSession) -> Image:
-    Creates a new image with the specified tags.
+- upsert(names: list[str], session: AsyncSession) -> dict[str, int]:
+    Gets or creates tags by name in one statement.
 
-- delete(image: Image, tag_schema: TagSchemaRequest, session: AsyncSession) -> Image:
+- create(image: Image, tag_schema: TagSchemaRequest, session: AsyncSession) -> list[str]:
+    Attaches the specified tags to an image.
+
+- delete(image: Image, tag_schema: TagSchemaRequest, session: AsyncSession) -> list[str]:
     Removes tags from an image.
 
-- search_images_by_tags(tag_names: list[str], session: AsyncSession) -> list[Image]:
-    Searches for images by tag names.
+- suggest(prefix: str, limit: int) -> list[tuple[str, int]]:
+    Suggests tags for a prefix, most used first.
+
+- popular(limit: int, session: AsyncSession) -> list:
+    Retrieves the most used tags.
+
+- related(name: str, limit: int, session: AsyncSession) -> tuple | None:
+    Retrieves the tags that appear together with a tag most often.
+
+- images(name, limit, cursor, backwards, session):
+    Retrieves the images with a tag, newest first.
+
+- search_images(all_names, any_names, none_names, limit, cursor, backwards, session):
+    Finds images by tag names with all-of / any-of / none-of semantics.
 """
 
+
+from sqlalchemy import update, delete, func, exists, union
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.database.sql.models import Tag, Image, ImageTag
+from sqlalchemy.orm import aliased
+from src.database.cache.feed_cache import feed_cache
+from src.database.cache.tag_index import tag_index
+from src.database.cache.dirty_tags import dirty_tags
+from src.database.sql.models import Tag, Image, ImageTag, TagStats, TagCooccurrence
+from src.database.sql.pagination import (
+    decode_cursor,
+    keyset_order,
+    keyset_page,
+    keyset_where,
+)
+from src.image.repository import ImageQuery, search_append, feed_statement, feed_item
+from src.image.schemas import ImageSchemaResponse
 from src.tag.schemas import TagSchemaRequest
 
 
+def tag_names(names: list[str]) -> list[str]:
+    """
+    Strip tag names and drop empty and repeated ones, keeping their order.
+
+    :param names: list[str]: The tag names from a request.
+    :return: The distinct tag names.
+    """
+    return list(dict.fromkeys(name.strip() for name in names if name.strip()))
+
+
 class TagRepository:
+    @staticmethod
+    async def upsert(names: list[str], session: AsyncSession) -> dict[str, int]:
+        """
+        Get or create tags by name.
+
+        New names are inserted and existing ones selected in a single statement.
+        A name that a concurrent request inserted after the statement started is
+        visible to neither part; such names are picked up by a second select.
+
+        :param names: list[str]: Distinct tag names.
+        :param session: AsyncSession: The database session.
+        :return: The tag IDs by name.
+        """
+        inserted = (
+            insert(Tag)
+            .values([{"name": name} for name in names])
+            .on_conflict_do_nothing(index_elements=[Tag.name])
+            .returning(Tag.id, Tag.name)
+            .cte("inserted")
+        )
+        stmt = select(inserted.c.id, inserted.c.name).union_all(
+            select(Tag.id, Tag.name).where(Tag.name.in_(names))
+        )
+        tags = {row.name: row.id for row in (await session.execute(stmt)).all()}
+        missing = [name for name in names if name not in tags]
+        if missing:
+            raced = await session.execute(select(Tag.id, Tag.name).where(Tag.name.in_(missing)))
+            tags.update({row.name: row.id for row in raced.all()})
+        return tags
+
     @staticmethod
     async def create(
             image: Image, tag_schema: TagSchemaRequest, session: AsyncSession
-    ) -> Image:
+    ) -> list[str]:
         """
-        Create a new image with specified tags.
+        Attach tags to an image, creating the tags that do not exist yet.
 
-        :param image: Image: The image object to create.
-        :param tag_schema: TagSchemaRequest: The tag schema to create new tags.
+        Costs two statements however many tags are given: one tag upsert, and one
+        that inserts the missing image_tags rows and appends their names to the
+        image's search vector.
+
+        :param image: Image: The image to tag.
+        :param tag_schema: TagSchemaRequest: The tag schema with names to attach.
         :param session: AsyncSession: The database session.
-        :return: An image object.
-        """
-        for tag in tag_schema.names:
-            stmt = select(Tag).where(Tag.name == tag)
-            tag_to_append = await session.execute(stmt)
-            tag_to_append = tag_to_append.scalars().unique().one_or_none()
-            if tag_to_append:
-                image.tags.append(tag_to_append)
-            else:
-                image.tags.append(Tag(name=tag))
-        session.add(image)
+        :return: The names of the tags that were not attached to the image before.
+        """
+        names = tag_names(tag_schema.names)
+        if not names:
+            return []
+        tags = await TagRepository.upsert(names, session)
+        attached = (
+            insert(ImageTag)
+            .values([{"image_id": image.id, "tag_id": tag_id} for tag_id in tags.values()])
+            .on_conflict_do_nothing(index_elements=[ImageTag.image_id, ImageTag.tag_id])
+            .returning(ImageTag.tag_id)
+            .cte("attached")
+        )
+        attached_tags = Tag.id.in_(select(attached.c.tag_id))
+        text = select(func.string_agg(Tag.name, " ")).where(attached_tags).scalar_subquery()
+        attached_names = select(func.array_agg(Tag.name)).where(attached_tags).scalar_subquery()
+        attached_names = await session.scalar(
+            update(Image)
+            .where(Image.id == image.id)
+            .values(search_vector=search_append(text, "B"))
+            .returning(attached_names)
+            .execution_options(synchronize_session=False)
+        )
         await session.commit()
-        await session.refresh(image)
-        return image
+        await feed_cache.invalidate()
+        attached_names = list(attached_names or [])
+        await tag_index.add(attached_names)
+        await dirty_tags.mark(attached_names)
+        return attached_names
 
     @staticmethod
     async def delete(
             image: Image, tag_schema: TagSchemaRequest, session: AsyncSession
-    ) -> Image:
+    ) -> list[str]:
         """
-        Remove tags from an image.
+        Remove tags from an image with a single DELETE.
 
         :param image: Image: The image object to modify.
         :param tag_schema: TagSchemaRequest: The tag schema with names to delete.
         :param session: AsyncSession: The database session.
-        :return: The modified image object.
+        :return: The names of the tags that were removed.
         """
-        for tag in image.tags:
-            if tag.name in tag_schema.names:
-                image.tags.remove(tag)
-        session.add(image)
+        names = tag_names(tag_schema.names)
+        if not names:
+            return []
+        removed = await session.execute(
+            delete(ImageTag)
+            .where(
+                (ImageTag.image_id == image.id)
+                & (ImageTag.tag_id == Tag.id)
+                & Tag.name.in_(names)
+            )
+            .returning(Tag.name)
+            .execution_options(synchronize_session=False)
+        )
+        removed = list(removed.scalars().all())
+        if removed:
+            await ImageQuery.refresh_search_vector(image.id, session)
         await session.commit()
-        return image
+        if removed:
+            await feed_cache.invalidate()
+            await tag_index.remove(removed)
+            await dirty_tags.mark(removed)
+        return removed
+
+    @staticmethod
+    async def suggest(prefix: str, limit: int) -> list[tuple[str, int]]:
+        """
+        Suggest tags that start with a prefix, most used first.
+
+        Answered from the Redis tag index without touching the database.
+
+        :param prefix: str: The prefix, matched case-insensitively.
+        :param limit: int: The maximum number of suggestions.
+        :return: Pairs of tag name and the number of images using it.
+        """
+        return await tag_index.suggest(prefix, limit)
+
+    @staticmethod
+    async def popular(limit: int, session: AsyncSession) -> list:
+        """
+        Retrieve the most used tags from the materialized tag stats.
+
+        :param limit: int: The maximum number of tags.
+        :param session: AsyncSession: The database session.
+        :return: Rows with name and count, most used first.
+        """
+        stmt = (
+            select(Tag.name, TagStats.image_count.label("count"))
+            .join(TagStats, TagStats.tag_id == Tag.id)
+            .order_by(TagStats.image_count.desc(), Tag.name)
+            .limit(limit)
+        )
+        popular = await session.execute(stmt)
+        return list(popular.all())
 
     @staticmethod
-    async def search_images_by_tags(tag_names: list[str], session: AsyncSession) -> list[Image]:
+    async def related(name: str, limit: int, session: AsyncSession) -> tuple | None:
         """
-        Search for images by tag names.
+        Retrieve the tags that appear on the same images as a tag most often.
 
-        :param tag_names: list[str]: A list of tag names to search for.
-        :param session: AsyncSession: The current database session.
-        :return: A list of image objects matching the tags.
+        :param name: str: The name of the tag.
+        :param limit: int: The maximum number of related tags.
+        :param session: AsyncSession: The database session.
+        :return: The image count of the tag and rows with name and count of the
+            related tags, or None if the tag does not exist.
         """
+        tag = await session.execute(
+            select(Tag.id, func.coalesce(TagStats.image_count, 0).label("count"))
+            .outerjoin(TagStats, TagStats.tag_id == Tag.id)
+            .where(Tag.name == name)
+        )
+        tag = tag.one_or_none()
+        if tag is None:
+            return None
         stmt = (
-            select(Image)
-            .join(ImageTag, ImageTag.image_id == Image.id)
-            .join(Tag, Tag.id == ImageTag.tag_id)
-            .where(Tag.name.in_(tag_names))
-            .union_all(
-                select(Image).filter(Image.title.in_(tag_names))
+            select(Tag.name, TagCooccurrence.count)
+            .join(Tag, Tag.id == TagCooccurrence.related_tag_id)
+            .where(TagCooccurrence.tag_id == tag.id)
+            .order_by(TagCooccurrence.count.desc(), Tag.name)
+            .limit(limit)
+        )
+        related = await session.execute(stmt)
+        return tag.count, list(related.all())
+
+    @staticmethod
+    async def images(
+            name: str,
+            limit: int,
+            cursor: str | None,
+            backwards: bool,
+            session: AsyncSession,
+    ) -> tuple[list[ImageSchemaResponse], str | None, str | None]:
+        """
+        Retrieve the images with a tag, newest first.
+
+        A page walks the (tag_id, image_id) index of image_tags backwards from the
+        cursor, so every page costs the same however many images carry the tag.
+
+        :param name: str: The name of the tag.
+        :param limit: int: The page size.
+        :param cursor: str | None: The cursor returned with a previous page.
+        :param backwards: bool: Whether to fetch the page before the cursor.
+        :param session: AsyncSession: The database session.
+        :return: The feed items, the next cursor and the previous cursor.
+        :raises ValueError: If the cursor is malformed.
+        """
+        return await TagRepository.search_images(
+            [name], [], [], limit, cursor, backwards, session
+        )
+
+    @staticmethod
+    async def search_images(
+            all_names: list[str],
+            any_names: list[str],
+            none_names: list[str],
+            limit: int,
+            cursor: str | None,
+            backwards: bool,
+            session: AsyncSession,
+    ) -> tuple[list[ImageSchemaResponse], str | None, str | None]:
+        """
+        Find images tagged with all of, any of and none of the given tag names,
+        newest first.
+
+        Matching runs on image_tags only, and the images table is only read for the
+        rows of the returned page.
+
+        - With "all" tags, the first one drives a backward scan of the
+          (tag_id, image_id) index in image_id order. Every other condition is an
+          index probe on (image_id, tag_id).
+        - With only "any" tags, every tag drives its own backward index scan, each
+          limited to one page. The union of these short scans is then ordered and
+          limited, so no tag's full match set is sorted.
+
+        :param all_names: list[str]: Tags every image must have.
+        :param any_names: list[str]: Tags of which every image must have at least one.
+        :param none_names: list[str]: Tags no image may have.
+        :param limit: int: The page size.
+        :param cursor: str | None: The cursor returned with a previous page.
+        :param backwards: bool: Whether to fetch the page before the cursor.
+        :param session: AsyncSession: The database session.
+        :return: The feed items, the next cursor and the previous cursor.
+        :raises ValueError: If neither all_names nor any_names is given, or the cursor
+            is malformed.
+        """
+        if not all_names and not any_names:
+            raise ValueError("Give at least one tag to include")
+        values = decode_cursor(cursor, int) if cursor else None
+
+        def tag_id(name: str):
+            return select(Tag.id).where(Tag.name == name).scalar_subquery()
+
+        def tag_ids(names: list[str]):
+            return select(Tag.id).where(Tag.name.in_(names))
+
+        def tagged(driver, tag_condition):
+            other = aliased(ImageTag)
+            return exists().where(
+                (other.image_id == driver.image_id) & tag_condition(other.tag_id)
             )
+
+        def page_of(matches, column):
+            if values is not None:
+                matches = matches.where(keyset_where((column,), values, True, backwards))
+            return matches.order_by(*keyset_order((column,), True, backwards)).limit(limit + 1)
+
+        def driven_by(driver, tag_condition):
+            matches = select(driver.image_id).where(tag_condition(driver.tag_id))
+            if none_names:
+                matches = matches.where(
+                    ~tagged(driver, lambda column: column.in_(tag_ids(none_names)))
+                )
+            return matches
+
+        if all_names:
+            driver = aliased(ImageTag, name="driver")
+            matches = driven_by(driver, lambda column: column == tag_id(all_names[0]))
+            for name in all_names[1:]:
+                matches = matches.where(
+                    tagged(driver, lambda column, name=name: column == tag_id(name))
+                )
+            if any_names:
+                matches = matches.where(
+                    tagged(driver, lambda column: column.in_(tag_ids(any_names)))
+                )
+            matches = page_of(matches, driver.image_id)
+        else:
+            scans = []
+            for i, name in enumerate(dict.fromkeys(any_names)):
+                driver = aliased(ImageTag, name=f"driver_{i}")
+                matches = driven_by(driver, lambda column, name=name: column == tag_id(name))
+                scans.append(page_of(matches, driver.image_id))
+            matched = (union(*scans) if len(scans) > 1 else scans[0]).subquery("matched")
+            matches = page_of(select(matched.c.image_id), matched.c.image_id)
+        stmt = feed_statement().where(Image.id.in_(matches)).order_by(
+            *keyset_order((Image.id,), True, backwards)
+        )
+        found = await session.execute(stmt)
+        rows, next_cursor, prev_cursor = keyset_page(
+            found.all(), limit, cursor, backwards, lambda row: (row.id,)
         )
-        images = await session.execute(stmt)
-        return images.scalars().all()
+        return [feed_item(row) for row in rows], next_cursor, prev_cursor
@@ -6,22 +6,37 @@ Routes:
 
 - POST /tag/create: Create a new tag.
 - DELETE /tag/delete: Delete tags from an image.
-- GET /tag/search: Search for images by tag name.
+- GET /tag/suggest: Suggest tags for a prefix.
+- GET /tag/popular: Get the most used tags as a tag cloud.
+- GET /tag/{name}/related: Get the tags used together with a tag.
+- GET /tag/{name}/images: Get the images with a tag.
+- GET /tag/search: Search for images by tag names.
 """
+import math
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.sql.postgres import database
 from src.database.sql.models import User
 from src.auth.service import current_active_user
-from src.image.repository import ImageQuery
-from src.tag.schemas import TagSchemaRequest
-from src.tag.repository import TagRepository
-from src.image.routes import get_image
+from src.database.sql.pagination import set_cursor_headers
+from src.image.schemas import ImageSchemaResponse
+from src.tag.schemas import (
+    TagSchemaRequest,
+    TagSuggestionResponse,
+    PopularTagResponse,
+    RelatedTagResponse,
+)
+from src.tag.repository import TagRepository, tag_names
+from src.image.routes import find_image
 from src.auth.utils.access import access_service
 
 router = APIRouter(prefix="/tag", tags=["tags"])
 
+MAX_SEARCH_TAGS = 10
+TAG_CLOUD_WEIGHTS = 5
+
 
 @router.post("/create", status_code=status.HTTP_201_CREATED)
 async def create_tag(
@@ -37,7 +52,7 @@ async def create_tag(
     :param session: AsyncSession: The database session.
     :return: A dictionary with a "detail" message.
     """
-    image = await get_image(tag_data.image_id, user, session)
+    image = await find_image(tag_data.image_id, session)
     access_service("can_add_tag", user, image)
     await TagRepository.create(image, tag_data, session)
     return {"detail": "tags added"}
@@ -57,27 +72,182 @@ async def delete_tags(
     :param session: AsyncSession: The database session.
     :return: No content response.
     """
-    image = await get_image(tag_data.image_id, user, session)
+    image = await find_image(tag_data.image_id, session)
     access_service("can_delete_tag", user, image)
     await TagRepository.delete(image, tag_data, session)
 
 
-@router.get("/search")
-async def search_images_by_tags(tag_name: str, session: AsyncSession = Depends(database)):
+@router.get("/suggest", response_model=list[TagSuggestionResponse])
+async def suggest_tags(
+        prefix: str = Query(min_length=1, max_length=50),
+        limit: int = Query(default=10, ge=1, le=50),
+        user: User = Depends(current_active_user),
+):
     """
-    Search for images by tag name.
+    Suggest tags that start with a prefix, most used first.
 
-    :param tag_name: str: The tag name to search for.
+    :param prefix: str: The prefix typed so far, matched case-insensitively.
+    :param limit: int: The maximum number of suggestions.
+    :param user: User: The current authenticated user.
+    :return: A list of tag names with the number of images using them.
+    """
+    suggestions = await TagRepository.suggest(prefix, limit)
+    return [TagSuggestionResponse(name=name, count=count) for name, count in suggestions]
 
-    :param session: AsyncSession: The database session.
-    :raises HTTPException 404 if the tag is not found.
-    :return: A list of images matching the tag.
 
+@router.get("/popular", response_model=list[PopularTagResponse])
+async def get_popular_tags(
+        limit: int = Query(default=50, ge=1, le=200),
+        user: User = Depends(current_active_user),
+        session: AsyncSession = Depends(database),
+):
     """
+    Get the most used tags as a tag cloud.
+
+    Every tag gets a weight from 1 to 5 on a logarithmic scale of its image count,
+    relative to the other tags in the result. Counts come from the materialized tag
+    stats and may lag behind recent tag changes by up to one refresh interval.
 
-    tags = await TagRepository.search_tags(tag_name, session)
+    :param limit: int: The maximum number of tags.
+    :param user: User: The current authenticated user.
+    :param session: AsyncSession: The database session.
+    :return: A list of tags with their image count and weight, most used first.
+    """
+    tags = await TagRepository.popular(limit, session)
     if not tags:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Tag not found')
-    image_ids = [tag.image_id for tag in tags]
-    images = await ImageQuery.search_images_by_tags(image_ids, session)
+        return []
+    low, high = math.log(tags[-1].count), math.log(tags[0].count)
+    spread = (high - low) or 1
+    return [
+        PopularTagResponse(
+            name=tag.name,
+            count=tag.count,
+            weight=1 + round((TAG_CLOUD_WEIGHTS - 1) * (math.log(tag.count) - low) / spread),
+        )
+        for tag in tags
+    ]
+
+
+@router.get("/{name}/related", response_model=list[RelatedTagResponse])
+async def get_related_tags(
+        name: str,
+        limit: int = Query(default=20, ge=1, le=100),
+        user: User = Depends(current_active_user),
+        session: AsyncSession = Depends(database),
+):
+    """
+    Get the tags that appear on the same images as a tag most often.
+
+    The score of a related tag is the share of the tag's images that also carry it.
+
+    :param name: str: The name of the tag.
+    :param limit: int: The maximum number of related tags.
+    :param user: User: The current authenticated user.
+    :param session: AsyncSession: The database session.
+    :raises HTTPException 404 if the tag does not exist.
+    :return: A list of related tags with their shared image count and score.
+    """
+    related = await TagRepository.related(name, limit, session)
+    if related is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tag not found")
+    count, tags = related
+    return [
+        RelatedTagResponse(
+            name=tag.name, count=tag.count, score=round(tag.count / count, 4) if count else 0
+        )
+        for tag in tags
+    ]
+
+
+@router.get("/{name}/images", response_model=list[ImageSchemaResponse])
+async def get_tag_images(
+        name: str,
+        response: Response,
+        limit: int = Query(default=36, ge=1, le=100),
+        cursor: str | None = None,
+        direction: Literal["next", "prev"] = "next",
+        user: User = Depends(current_active_user),
+        session: AsyncSession = Depends(database),
+):
+    """
+    Get the images with a tag, newest first, in the same projection as the feed.
+
+    Cursors for the next and previous pages are returned in the X-Next-Cursor and
+    X-Prev-Cursor headers.
+
+    :param name: str: The name of the tag.
+    :param response: Response: The outgoing response, used for cursor headers.
+    :param limit: int: The page size.
+    :param cursor: str | None: The cursor of the page to continue from.
+    :param direction: str: "next" or "prev", relative to the cursor.
+    :param user: User: The current authenticated user.
+    :param session: AsyncSession: The database session.
+    :raises HTTPException 400 if the cursor is invalid.
+    :return: A list of images with the tag.
+    """
+    try:
+        images, next_cursor, prev_cursor = await TagRepository.images(
+            name, limit, cursor, direction == "prev", session
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor!"
+        )
+    set_cursor_headers(response, next_cursor, prev_cursor)
+    return images
+
+
+@router.get("/search", response_model=list[ImageSchemaResponse])
+async def search_images_by_tags(
+        response: Response,
+        tag_name: str | None = None,
+        all_tags: list[str] = Query(default=[], alias="all"),
+        any_tags: list[str] = Query(default=[], alias="any"),
+        none_tags: list[str] = Query(default=[], alias="none"),
+        limit: int = Query(default=36, ge=1, le=100),
+        cursor: str | None = None,
+        direction: Literal["next", "prev"] = "next",
+        session: AsyncSession = Depends(database),
+):
+    """
+    Search for images by tag names, newest first.
+
+    Images must have every tag in "all", at least one tag in "any" and no tag in
+    "none", e.g. ?all=cat&all=black&none=dog. The tag_name parameter is kept for
+    older clients and counts as an "all" tag. Cursors for the next and previous
+    pages are returned in the X-Next-Cursor and X-Prev-Cursor headers.
+
+    :param response: Response: The outgoing response, used for cursor headers.
+    :param tag_name: str | None: A single tag name to search for.
+    :param all_tags: list[str]: Tags every image must have.
+    :param any_tags: list[str]: Tags of which every image must have at least one.
+    :param none_tags: list[str]: Tags no image may have.
+    :param limit: int: The page size.
+    :param cursor: str | None: The cursor of the page to continue from.
+    :param direction: str: "next" or "prev", relative to the cursor.
+    :param session: AsyncSession: The database session.
+    :raises HTTPException 400 if no tag to include is given or the cursor is invalid.
+    :return: A list of images matching the tags.
+    """
+    all_names = tag_names(all_tags + ([tag_name] if tag_name else []))
+    any_names, none_names = tag_names(any_tags), tag_names(none_tags)
+    if not all_names and not any_names:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Give at least one tag in all, any or tag_name!",
+        )
+    if len(all_names) + len(any_names) + len(none_names) > MAX_SEARCH_TAGS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {MAX_SEARCH_TAGS} tags per search!",
+        )
+    try:
+        images, next_cursor, prev_cursor = await TagRepository.search_images(
+            all_names, any_names, none_names, limit, cursor, direction == "prev", session
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor!"
+        )
+    set_cursor_headers(response, next_cursor, prev_cursor)
     return images
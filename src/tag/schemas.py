@@ -7,6 +7,23 @@ class TagSchemaRequest(BaseModel):
     names: List[str]
 
 
+class TagSuggestionResponse(BaseModel):
+    name: str
+    count: int
+
+
+class PopularTagResponse(BaseModel):
+    name: str
+    count: int
+    weight: int
+
+
+class RelatedTagResponse(BaseModel):
+    name: str
+    count: int
+    score: float
+
+
 class TagSchemaUpdateRequest(TagSchemaRequest):
     pass
 
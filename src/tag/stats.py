@@ -0,0 +1,215 @@
+"""
+Tag Stats
+
+This module computes the materialized tag statistics: the number of images per
+tag (tag_stats) and the number of images every pair of tags shares
+(tag_cooccurrences).
+
+Both come from one sparse product. With M the image x tag incidence matrix built
+from image_tags, C = M.T @ M holds the image count of every tag on its diagonal
+and the co-occurrence counts off it.
+
+- A full refresh computes C over every image and replaces both tables.
+- An incremental refresh takes the tags marked dirty by tag writes, loads only
+  the images that carry one of them, and rewrites the rows of C for those tags
+  and their mirror entries. Every other entry is left untouched. Its cost follows
+  the images of the dirty tags, not the number of changes: a popular tag that is
+  marked dirty reloads the tags of all its images on every run it is marked in.
+
+Run it with ``python -m src.tag.stats [--full]``; workers also run it on a
+schedule (TAG_STATS_REFRESH_INTERVAL). Only one refresh runs at a time: a run
+holds a Redis lock that expires after TAG_STATS_LOCK_TTL seconds, and a run that
+finds it taken is skipped.
+
+Functions:
+- cooccurrence_matrix: Build C = M.T @ M from (image_id, tag_id) pairs.
+- refresh_all: Recompute the stats of every tag.
+- refresh_dirty: Recompute the stats of the tags changed since the last refresh.
+"""
+import argparse
+import asyncio
+from contextlib import asynccontextmanager
+
+import numpy as np
+from redis.exceptions import LockError
+from scipy import sparse
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import settings
+from src.database.cache.dirty_tags import dirty_tags
+from src.database.cache.redis_conn import cache_database
+from src.database.sql.models import ImageTag, Tag, TagCooccurrence, TagStats
+from src.database.sql.postgres import database
+
+WRITE_BATCH = 5000
+LOCK_KEY = "tag_stats:lock"
+
+
+def cooccurrence_matrix(pairs: np.ndarray) -> tuple[np.ndarray, sparse.coo_matrix]:
+    """
+    Build the tag co-occurrence matrix from image/tag pairs.
+
+    :param pairs: np.ndarray: An (n, 2) array of image_id, tag_id rows.
+    :return: The tag IDs of the rows and columns, and C = M.T @ M.
+    """
+    image_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+    tag_ids, columns = np.unique(pairs[:, 1], return_inverse=True)
+    incidence = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.int32), (rows, columns)),
+        shape=(len(image_ids), len(tag_ids)),
+    )
+    return tag_ids, (incidence.T @ incidence).tocoo()
+
+
+async def _load_pairs(stmt, session: AsyncSession) -> np.ndarray:
+    chunks = []
+    result = await session.stream(stmt.execution_options(yield_per=WRITE_BATCH))
+    async for partition in result.partitions():
+        chunks.append(np.array(partition, dtype=np.int64))
+    if not chunks:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.concatenate(chunks)
+
+
+async def _write(model, rows: list[dict], session: AsyncSession) -> None:
+    for start in range(0, len(rows), WRITE_BATCH):
+        await session.execute(insert(model), rows[start:start + WRITE_BATCH])
+
+
+async def _store(
+        tag_ids: np.ndarray, matrix: sparse.coo_matrix, keep, session: AsyncSession
+) -> None:
+    counts = matrix.diagonal()
+    await _write(
+        TagStats,
+        [
+            {"tag_id": int(tag_id), "image_count": int(count)}
+            for tag_id, count in zip(tag_ids, counts)
+            if count and keep(tag_id)
+        ],
+        session,
+    )
+    off_diagonal = matrix.row != matrix.col
+    await _write(
+        TagCooccurrence,
+        [
+            {"tag_id": int(tag_ids[row]), "related_tag_id": int(tag_ids[col]), "count": int(count)}
+            for row, col, count in zip(
+                matrix.row[off_diagonal], matrix.col[off_diagonal], matrix.data[off_diagonal]
+            )
+            if keep(tag_ids[row]) or keep(tag_ids[col])
+        ],
+        session,
+    )
+
+
+@asynccontextmanager
+async def _refresh_lock():
+    redis = await cache_database()
+    lock = redis.lock(LOCK_KEY, timeout=settings.tag_stats_lock_ttl)
+    if not await lock.acquire(blocking=False):
+        yield None
+        return
+    try:
+        yield lock
+    finally:
+        try:
+            await lock.release()
+        except LockError:
+            print("The tag stats refresh outlived its lock (TAG_STATS_LOCK_TTL)")
+
+
+async def refresh_all(session: AsyncSession) -> int | None:
+    """
+    Recompute the stats of every tag and replace both tables in one transaction.
+
+    :param session: AsyncSession: The database session.
+    :return: The number of tags in use, or None if another refresh is running.
+    """
+    async with _refresh_lock() as lock:
+        if lock is None:
+            return None
+        await dirty_tags.clear()
+        pairs = await _load_pairs(select(ImageTag.image_id, ImageTag.tag_id), session)
+        await session.execute(delete(TagCooccurrence))
+        await session.execute(delete(TagStats))
+        if len(pairs):
+            tag_ids, matrix = cooccurrence_matrix(pairs)
+            await _store(tag_ids, matrix, lambda tag_id: True, session)
+        await session.commit()
+        return len(np.unique(pairs[:, 1]))
+
+
+async def refresh_dirty(
+        session: AsyncSession, batch_size: int = settings.tag_stats_batch_size
+) -> int | None:
+    """
+    Recompute the stats of the tags marked dirty since the last refresh.
+
+    Every round reloads the tags of all images that carry a dirty tag, so the
+    cost of a round grows with the image count of its tags.
+
+    :param session: AsyncSession: The database session.
+    :param batch_size: int: The maximum number of tags refreshed per round.
+    :return: The number of refreshed tags, or None if another refresh is running.
+    """
+    async with _refresh_lock() as lock:
+        if lock is None:
+            return None
+        refreshed = 0
+        while names := await dirty_tags.take(batch_size):
+            try:
+                dirty = await session.scalars(select(Tag.id).where(Tag.name.in_(names)))
+                dirty = np.array(list(dirty.all()), dtype=np.int64)
+                if len(dirty):
+                    await _refresh_tags(dirty, session)
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                await dirty_tags.restore(names)
+                raise
+            refreshed += len(names)
+            # Keep the lock for as long as rounds complete.
+            await lock.reacquire()
+        return refreshed
+
+
+async def _refresh_tags(dirty: np.ndarray, session: AsyncSession) -> None:
+    tagged = select(ImageTag.image_id).where(ImageTag.tag_id.in_(dirty.tolist()))
+    pairs = await _load_pairs(
+        select(ImageTag.image_id, ImageTag.tag_id).where(ImageTag.image_id.in_(tagged)),
+        session,
+    )
+    dirty_ids = dirty.tolist()
+    await session.execute(
+        delete(TagCooccurrence).where(
+            TagCooccurrence.tag_id.in_(dirty_ids) | TagCooccurrence.related_tag_id.in_(dirty_ids)
+        )
+    )
+    await session.execute(delete(TagStats).where(TagStats.tag_id.in_(dirty_ids)))
+    if len(pairs):
+        tag_ids, matrix = cooccurrence_matrix(pairs)
+        dirty_set = set(dirty_ids)
+        # Only rows of dirty tags are complete: the loaded images are exactly the
+        # ones carrying a dirty tag.
+        await _store(tag_ids, matrix, lambda tag_id: int(tag_id) in dirty_set, session)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Refresh the tag stats.")
+    parser.add_argument("--full", action="store_true", help="recompute every tag")
+    args = parser.parse_args()
+    async with database.async_session() as session:
+        if args.full:
+            total = await refresh_all(session)
+        else:
+            total = await refresh_dirty(session)
+    if total is None:
+        print("Another tag stats refresh is running")
+    else:
+        print(f"Refreshed the stats of {total} tags")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,23 @@
+"""
+Tag Tasks
+
+This module contains the Celery tasks for tag statistics.
+
+Tasks:
+- refresh_tag_stats_task: Refresh the stats of the tags changed since the last run.
+"""
+from src.database.sql.postgres import database
+from src.tag.stats import refresh_all, refresh_dirty
+from src.worker import celery_app, run_async
+
+
+async def _refresh_tag_stats(full: bool):
+    async with database.async_session() as session:
+        if full:
+            return await refresh_all(session)
+        return await refresh_dirty(session)
+
+
+@celery_app.task(name="tags.refresh_stats")
+def refresh_tag_stats_task(full: bool = False):
+    run_async(_refresh_tag_stats, full)
@@ -0,0 +1,61 @@
+"""
+Background Worker
+
+This module contains the Celery application that runs slow image work (uploads and
+transformations) and periodic maintenance (tag stats) outside the request cycle.
+
+Start a worker with ``celery -A src.worker worker --loglevel=info`` and the
+scheduler with ``celery -A src.worker beat``.
+"""
+import asyncio
+
+from celery import Celery
+
+from src.config import settings
+from src.database.cache.redis_conn import cache_database
+from src.database.sql.postgres import database
+from src.image.utils.storage_client import storage_client
+
+broker_url = (
+    settings.celery_broker_url or f"redis://{settings.redis_host}:{settings.redis_port}/1"
+)
+
+celery_app = Celery(
+    "memento", broker=broker_url, include=["src.image.tasks", "src.tag.tasks"]
+)
+celery_app.conf.update(
+    task_acks_late=True,
+    task_ignore_result=True,
+    worker_prefetch_multiplier=1,
+    beat_schedule={
+        "refresh-tag-stats": {
+            "task": "tags.refresh_stats",
+            "schedule": settings.tag_stats_refresh_interval,
+        },
+    },
+)
+
+
+def run_async(coro_fn, *args):
+    """
+    Run an async job function from a synchronous Celery task.
+
+    Every task gets its own event loop, so the shared connections that are bound to
+    a loop are closed once the job is done.
+
+    :param coro_fn: The async function to run.
+    :param args: The arguments of the function.
+    :return: The result of the function.
+    """
+
+    async def runner():
+        try:
+            return await coro_fn(*args)
+        finally:
+            await storage_client.close()
+            if cache_database.redis is not None:
+                await cache_database.redis.close()
+                cache_database.redis = None
+            await database.engine.dispose()
+
+    return asyncio.run(runner())